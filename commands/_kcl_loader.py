@@ -0,0 +1,12 @@
+# Shared loader for the KCLExporter class used by the export commands.
+# The exporter lives in the standalone script package and is only imported
+# the first time a command needs it, so add-in startup stays fast.
+
+import functools
+
+
+@functools.lru_cache(maxsize=1)
+def get_exporter_class():
+    """Returns the KCLExporter class, importing the exporter script on the first call."""
+    from ..fusion_kcl_export.fusion_kcl_export import KCLExporter
+    return KCLExporter
@@ -1,20 +1,15 @@
 import adsk.core
 import adsk.fusion
+import json
 import os
-import sys
-import importlib.util
+import operator
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
 from ...lib import fusionAddInUtils as futil
 from ... import config
+from .._kcl_loader import get_exporter_class
 
-# Add the script directory to Python path to import the KCLExporter
-script_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'fusion-kcl-export-script')
-if script_dir not in sys.path:
-    sys.path.append(script_dir)
-# Import the script module (Python treats hyphens in filenames as modules)
-spec = importlib.util.spec_from_file_location("fusion_kcl_export", os.path.join(script_dir, "fusion-kcl-export.py"))
-fusion_kcl_export = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(fusion_kcl_export)
-KCLExporter = fusion_kcl_export.KCLExporter
 app = adsk.core.Application.get()
 ui = app.userInterface
 
@@ -38,6 +33,15 @@ COMMAND_BESIDE_ID = 'ScriptsManagerCommand'
 # Resource location for command icons, here we assume a sub folder in this directory named "resources".
 ICON_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources', '')
 
+# Name of the file in the output folder that records which design versions have been exported.
+EXPORT_CACHE_NAME = '.kcl_cache.json'
+
+# Minimum time in seconds between progress text redraws during a batch
+PROGRESS_UPDATE_INTERVAL = 0.1
+
+# Design class type, looked up once rather than for every opened file
+DESIGN_TYPE = adsk.fusion.Design.classType()
+
 # Local list of event handlers used to maintain a reference so
 # they are not released and garbage collected.
 local_handlers = []
@@ -114,6 +118,15 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
     # Create browse button for output folder selection
     inputs.addBoolValueInput('browse_output', 'Browse Output...', False, '', True)
     
+    # Create checkbox to re-export designs that have not changed since the last batch
+    inputs.addBoolValueInput('ignore_cache', 'Re-export Unchanged Files', True, '', False)
+    
+    # Create checkbox to merge runs of matching extrudes into one multi-sketch extrude
+    inputs.addBoolValueInput('group_extrudes', 'Group Matching Extrudes', True, '', False)
+    
+    # Create checkbox to start sketches on each plane from one shared variable
+    inputs.addBoolValueInput('share_sketch_planes', 'Share Sketch Planes', True, '', False)
+    
     # Create progress text box (read-only)
     inputs.addTextBoxCommandInput('progress_text', 'Progress', 'Ready to process...', 3, True)
 
@@ -137,13 +150,19 @@ def command_execute(args: adsk.core.CommandEventArgs):
     inputs = args.command.commandInputs
     output_folder: adsk.core.StringValueCommandInput = inputs.itemById('output_folder')
     progress_text: adsk.core.TextBoxCommandInput = inputs.itemById('progress_text')
+    ignore_cache: adsk.core.BoolValueCommandInput = inputs.itemById('ignore_cache')
+    group_extrudes: adsk.core.BoolValueCommandInput = inputs.itemById('group_extrudes')
+    share_sketch_planes: adsk.core.BoolValueCommandInput = inputs.itemById('share_sketch_planes')
 
     # Batch process from Fusion 360 project (no local folder needed)
     try:
         successful_count = batch_export_to_kcl(
             None,  # No project folder - uses active Fusion 360 project
             output_folder.value, 
-            progress_text
+            progress_text,
+            ignore_cache=ignore_cache.value,
+            group_extrudes=group_extrudes.value,
+            share_sketch_planes=share_sketch_planes.value
         )
         if successful_count > 0:
             ui.messageBox(f'Successfully exported {successful_count} files to: {output_folder.value}')
@@ -212,6 +231,58 @@ def command_destroy(args: adsk.core.CommandEventArgs):
     local_handlers = []
 
 
+def activate_document(document):
+    """Activate a document unless it is already the active one. Returns True if it was activated"""
+    if app.activeDocument == document:
+        return False
+    document.activate()
+    return True
+
+
+class _ProgressText:
+    """Throttles writes to the progress text box, since every write redraws the dialog."""
+
+    def __init__(self, text_input):
+        self.text_input = text_input
+        self.shown = text_input.text
+        self.pending = self.shown
+        self.last_update = 0.0
+
+    @property
+    def text(self):
+        return self.pending
+
+    @text.setter
+    def text(self, value: str):
+        self.pending = value
+        if time.monotonic() - self.last_update > PROGRESS_UPDATE_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        if self.pending != self.shown:
+            self.text_input.text = self.pending
+            self.shown = self.pending
+            self.last_update = time.monotonic()
+
+
+class _LogBuffer:
+    """Collects the batch log messages for one file so they are written with a single futil.log call."""
+
+    def __init__(self):
+        self.buf = []
+
+    def log(self, message: str):
+        self.buf.append(message)
+
+    def flush(self):
+        if self.buf:
+            futil.log('\n'.join(self.buf))
+            self.buf.clear()
+
+
+_log = _LogBuffer()
+
+
 def get_batch_error_summary():
     """Generate a helpful error summary for batch export failures"""
     issues = []
@@ -239,7 +310,90 @@ def get_batch_error_summary():
     return "\n".join(issues)
 
 
-def batch_export_to_kcl(project_folder, output_folder, progress_text=None):
+def report_completed_writes(completed_writes, successful, total_files, progress_text=None, export_cache=None):
+    """Report the batch writes that have finished since the last call (main thread only)
+
+    Successful writes with a cache entry are recorded in export_cache when one is given.
+    Returns the number of files that were written successfully.
+    """
+    newly_successful = 0
+    while True:
+        try:
+            file_name, output_file, cache_entry, future = completed_writes.get_nowait()
+        except queue.Empty:
+            return newly_successful
+        
+        try:
+            future.result()
+            newly_successful += 1
+            # Exports of unsaved edits have no cache entry, since they don't match the saved design
+            if export_cache is not None and cache_entry:
+                file_id, date_modified, export_options = cache_entry
+                export_cache[file_id] = {'dateModified': date_modified, 'output': output_file}
+                if export_options:
+                    export_cache[file_id]['options'] = export_options
+            futil.log(f"SUCCESS: Exported {file_name} -> {output_file}")
+            
+            if progress_text:
+                progress_text.text = f"Exported {successful + newly_successful}/{total_files}: {file_name}"
+                
+        except Exception as write_error:
+            record_file_error(file_name, write_error, progress_text)
+
+
+def load_export_cache(output_dir, output_version):
+    """Load the record of previously exported designs from the output folder
+
+    The record is discarded when it was written for a different exporter output version.
+    """
+    try:
+        with open(os.path.join(output_dir, EXPORT_CACHE_NAME), 'r', encoding='utf-8') as f:
+            cache_data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache_data, dict) or cache_data.get('outputVersion') != output_version:
+        return {}
+    export_cache = cache_data.get('files')
+    return export_cache if isinstance(export_cache, dict) else {}
+
+
+def save_export_cache(output_dir, export_cache, output_version):
+    """Save the record of exported designs to the output folder"""
+    try:
+        with open(os.path.join(output_dir, EXPORT_CACHE_NAME), 'w', encoding='utf-8') as f:
+            json.dump({'outputVersion': output_version, 'files': export_cache}, f, indent=1)
+    except OSError as cache_error:
+        futil.log(f"Warning: Could not save export cache: {str(cache_error)}")
+
+
+def is_export_current(export_cache, file_id, date_modified, output_file, export_options=()):
+    """Check if a design's KCL file is still up to date with the design and export options"""
+    entry = export_cache.get(file_id)
+    if not entry or entry.get('dateModified') != date_modified or entry.get('output') != output_file:
+        return False
+    if entry.get('options', []) != list(export_options):
+        return False
+    try:
+        return os.path.getmtime(output_file) >= date_modified
+    except OSError:
+        return False
+
+
+def record_file_error(file_name, file_error, progress_text=None):
+    """Log a per-file batch failure and remember the first error message"""
+    error_msg = str(file_error)
+    _log.flush()
+    futil.log(f"ERROR processing {file_name}: {error_msg}")
+    if progress_text:
+        progress_text.text = f"Error: {file_name} - {error_msg}"
+    
+    # Store the last error
+    if not hasattr(batch_export_to_kcl, 'last_error'):
+        batch_export_to_kcl.last_error = error_msg
+
+
+def batch_export_to_kcl(project_folder, output_folder, progress_text=None, ignore_cache=False, group_extrudes=False,
+                        share_sketch_planes=False):
     """NEW batch export approach - use active design's project folder"""
     
     # Clear any previous error
@@ -248,13 +402,17 @@ def batch_export_to_kcl(project_folder, output_folder, progress_text=None):
     
     futil.log(f"=== BATCH EXPORT STARTED (ACTIVE DESIGN APPROACH) ===")
     
+    if progress_text:
+        progress_text = _ProgressText(progress_text)
+    progress_dialog = None
+    
     try:
         # Get the currently active design
         design = app.activeProduct
         if not design:
             raise Exception("No active design found. Please open a design file first.")
         
-        if design.objectType != adsk.fusion.Design.classType():
+        if design.objectType != DESIGN_TYPE:
             raise Exception("Active product is not a Fusion 360 design.")
         
         # Get the active design's data file from the parent document
@@ -266,8 +424,9 @@ def batch_export_to_kcl(project_folder, output_folder, progress_text=None):
         if not active_data_file:
             raise Exception("Active design document does not have an associated data file. Please save the design first.")
         
+        active_file_id = active_data_file.id
         futil.log(f"Active design: {active_data_file.name}")
-        futil.log(f"Active design ID: {active_data_file.id}")
+        futil.log(f"Active design ID: {active_file_id}")
         
         # Get the parent folder of the active design
         project_folder_obj = active_data_file.parentFolder
@@ -277,34 +436,54 @@ def batch_export_to_kcl(project_folder, output_folder, progress_text=None):
         futil.log(f"Project folder: {project_folder_obj.name}")
         futil.log(f"Project folder ID: {project_folder_obj.id}")
         
-        # Collect all design files in the project folder
-        design_files = []
-        file_count = project_folder_obj.dataFiles.count
+        # Snapshot the folder's file metadata in a single pass over the collection
+        # so each data file's properties are only fetched from Fusion once
+        data_files = project_folder_obj.dataFiles
+        file_count = data_files.count
         futil.log(f"Found {file_count} files in project folder")
         
-        for i in range(file_count):
+        get_file_info = operator.attrgetter('name', 'fileExtension', 'id', 'dateModified')
+        file_snapshot = []
+        for i, data_file in enumerate(data_files):
             try:
-                data_file = project_folder_obj.dataFiles.item(i)
-                
-                # Only include Fusion 360 design files (.f3d)
-                if (hasattr(data_file, 'fileExtension') and 
-                    data_file.fileExtension == 'f3d'):
-                    
-                    design_files.append(data_file)
-                    futil.log(f"  📄 Will export: {data_file.name}")
-                else:
-                    futil.log(f"  ⏭️  Skipping: {data_file.name} (not .f3d file)")
-                    
+                file_snapshot.append((*get_file_info(data_file), data_file))
             except Exception as file_error:
                 futil.log(f"Error accessing file {i}: {str(file_error)}")
         
+        # Only include Fusion 360 design files (.f3d)
+        design_files = [(file_name, file_id, date_modified, data_file)
+                        for file_name, extension, file_id, date_modified, data_file in file_snapshot
+                        if extension == 'f3d']
+        if config.LOG_VERBOSE:
+            for file_name, extension, *_ in file_snapshot:
+                if extension == 'f3d':
+                    futil.log(f"  📄 Will export: {file_name}")
+                else:
+                    futil.log(f"  ⏭️  Skipping: {file_name} (not .f3d file)")
+        
         if not design_files:
             raise Exception("No design files found in the same project folder as the active design.")
         
         futil.log(f"=== FOUND {len(design_files)} DESIGN FILES TO EXPORT ===")
         
-        # Create output folder if it doesn't exist
-        os.makedirs(output_folder, exist_ok=True)
+        # Resolve and create the output folder once; output paths are built by plain
+        # string concatenation inside the loop
+        output_dir = os.path.abspath(output_folder)
+        os.makedirs(output_dir, exist_ok=True)
+        output_prefix = output_dir + os.sep
+        
+        # Designs that have not changed since they were last exported to this folder are skipped
+        exporter_class = get_exporter_class()
+        export_cache = {} if ignore_cache else load_export_cache(output_dir, exporter_class.OUTPUT_VERSION)
+        
+        # The active design is exported from its open document, so unsaved edits in it
+        # mean its last export can't be current
+        active_is_modified = active_document.isModified
+        
+        # Names of the enabled options that change the KCL output; they are recorded with
+        # each cached export so changing them exports the designs again
+        export_options = [name for name, enabled in (('groupExtrudes', group_extrudes),
+                                                     ('shareSketchPlanes', share_sketch_planes)) if enabled]
         
         total_files = len(design_files)
         processed = 0
@@ -313,91 +492,149 @@ def batch_export_to_kcl(project_folder, output_folder, progress_text=None):
         if progress_text:
             progress_text.text = f"Found {total_files} design files to export..."
         
-        # Process each design file
-        for data_file in design_files:
-            document = None
-            try:
-                processed += 1
-                if progress_text:
-                    progress_text.text = f"Processing {processed}/{total_files}: {data_file.name}"
-                
-                futil.log(f"Opening design file: {data_file.name}")
-                
-                # Open the design file
-                document = app.documents.open(data_file)
-                if not document:
-                    raise Exception(f"Failed to open design file: {data_file.name}")
-                
-                futil.log(f"Document opened: {document.name}")
-                
-                # Activate the document
-                document.activate()
-                futil.log(f"Document activated")
-                
-                # Get the design from the opened document
-                opened_design = app.activeProduct
-                if not opened_design:
-                    raise Exception("No active product after opening design file")
-                
-                if opened_design.objectType != adsk.fusion.Design.classType():
-                    raise Exception(f"Opened file is not a design: {opened_design.objectType}")
-                
-                futil.log(f"Opened design: {opened_design.parentDocument.name}")
-                futil.log(f"Content: {opened_design.rootComponent.sketches.count} sketches, {opened_design.rootComponent.features.count} features")
-                
-                # Generate output filename
-                base_name = os.path.splitext(data_file.name)[0]
-                output_file = os.path.join(output_folder, f"{base_name}.kcl")
-                
-                # Export using the script's KCLExporter
-                futil.log(f"Starting KCL export...")
-                
-                # Create the exporter with clean output (no debug)
-                exporter = KCLExporter(debug_planes=False)
-                
-                # Export the design
-                kcl_content = exporter.export_design(opened_design)
-                
-                # Write the KCL file
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    f.write(kcl_content)
-                
-                successful += 1
-                futil.log(f"SUCCESS: Exported {data_file.name} -> {output_file}")
-                
-                if progress_text:
-                    progress_text.text = f"Exported {successful}/{total_files}: {data_file.name}"
-                
-            except Exception as file_error:
-                error_msg = str(file_error)
-                futil.log(f"ERROR processing {data_file.name}: {error_msg}")
-                if progress_text:
-                    progress_text.text = f"Error: {data_file.name} - {error_msg}"
+        # The Fusion API may only be used from the main thread, so documents are opened,
+        # exported and closed here one at a time while the finished KCL text is handed
+        # off to a writer thread. Finished writes are reported back through a queue that
+        # is drained on the main thread, which owns the progress text.
+        completed_writes = queue.SimpleQueue()
+        
+        # Create a single exporter with clean output (no debug) for the whole batch;
+        # export_design resets its per-design state for every file
+        exporter = exporter_class(debug_planes=False, group_extrudes=group_extrudes,
+                                  share_sketch_planes=share_sketch_planes)
+        
+        # The Fusion API calls can't be interrupted from another thread, so instead of a
+        # per-file timeout the batch shows a progress dialog and checks its cancel
+        # button between files; files already exported are kept
+        progress_dialog = ui.createProgressDialog()
+        progress_dialog.isCancelButtonShown = True
+        progress_dialog.show('Batch Export to KCL', 'Exporting design %v of %m', 0, total_files)
+        cancelled = False
+        
+        # A single writer keeps the writes in order, so designs whose names map to the
+        # same .kcl file (such as "Part" and "Part.f3d") never write it at the same time
+        with ThreadPoolExecutor(max_workers=1) as writer_pool:
+            # Process each design file
+            for file_name, file_id, date_modified, data_file in design_files:
+                # Let Fusion handle a pending cancel click before starting the next file
+                adsk.doEvents()
+                if progress_dialog.wasCancelled:
+                    cancelled = True
+                    futil.log(f"Batch export cancelled after {processed}/{total_files} files")
+                    break
                 
-                # Store the last error
-                if not hasattr(batch_export_to_kcl, 'last_error'):
-                    batch_export_to_kcl.last_error = error_msg
+                successful += report_completed_writes(completed_writes, successful, total_files, progress_text, export_cache)
+                document = None
+                try:
+                    processed += 1
+                    if progress_text:
+                        progress_text.text = f"Processing {processed}/{total_files}: {file_name}"
+                    
+                    # Generate output filename (only a trailing .f3d is dropped, so dots
+                    # inside design names such as "Bracket v1.2" are kept)
+                    base_name = file_name
+                    if base_name.endswith('.f3d'):
+                        base_name = base_name[:-4]
+                    output_file = output_prefix + base_name + '.kcl'
+                    
+                    has_unsaved_edits = active_is_modified and file_id == active_file_id
+                    if not has_unsaved_edits and is_export_current(export_cache, file_id, date_modified,
+                                                                   output_file, export_options):
+                        successful += 1
+                        _log.log(f"Up to date, skipping: {file_name}")
+                        continue
+                    
+                    # Opening and exporting block the UI, so show which file is being worked
+                    # on now rather than leaving an earlier throttled message on screen
+                    if progress_text:
+                        progress_text.flush()
+                    
+                    if file_id == active_file_id:
+                        # The active design is already open, so export it in place and
+                        # leave it open rather than closing and reopening it afterwards
+                        _log.log(f"Using already open design file: {file_name}")
+                        activate_document(active_document)
+                    else:
+                        _log.log(f"Opening design file: {file_name}")
+                        
+                        # Open the design file
+                        document = app.documents.open(data_file)
+                        if not document:
+                            raise Exception(f"Failed to open design file: {file_name}")
+                        
+                        _log.log(f"Document opened: {document.name}")
+                        
+                        # Opening usually activates the document already, so only
+                        # activate it when needed to avoid an extra view rebuild
+                        if activate_document(document):
+                            _log.log(f"Document activated")
                     
-            finally:
-                # Always close the document
-                if document:
-                    try:
-                        document.close(False)  # Close without saving
-                        futil.log(f"Document closed: {document.name}")
-                    except Exception as close_error:
-                        futil.log(f"Error closing document: {str(close_error)}")
+                    # Get the design from the opened document
+                    opened_design = app.activeProduct
+                    if not opened_design:
+                        raise Exception("No active product after opening design file")
+                    
+                    if opened_design.objectType != DESIGN_TYPE:
+                        raise Exception(f"Opened file is not a design: {opened_design.objectType}")
+                    
+                    _log.log(f"Opened design: {opened_design.parentDocument.name}")
+                    _log.log(f"Content: {opened_design.rootComponent.sketches.count} sketches, {opened_design.rootComponent.features.count} features")
+                    
+                    # Export using the script's KCLExporter
+                    _log.log(f"Starting KCL export...")
+                    
+                    # Export the design, keeping the output as the exporter's chunks so
+                    # the whole file is never joined into one string
+                    kcl_chunks = list(exporter.export_design_iter(opened_design))
+                    
+                    # Queue the KCL file write
+                    future = writer_pool.submit(exporter.write_kcl_file, output_file, kcl_chunks)
+                    cache_entry = None if has_unsaved_edits else (file_id, date_modified, export_options)
+                    future.add_done_callback(
+                        lambda done, name=file_name, path=output_file, entry=cache_entry:
+                            completed_writes.put((name, path, entry, done)))
+                    
+                except Exception as file_error:
+                    record_file_error(file_name, file_error, progress_text)
+                        
+                finally:
+                    # Always close the document
+                    if document:
+                        try:
+                            document.close(False)  # Close without saving
+                            _log.log(f"Document closed: {document.name}")
+                        except Exception as close_error:
+                            _log.log(f"Error closing document: {str(close_error)}")
+                    
+                    # Write out this file's diagnostics in one go
+                    _log.flush()
+                    progress_dialog.progressValue = processed
+            
+        # Leaving the pool waits for the remaining writes to finish
+        successful += report_completed_writes(completed_writes, successful, total_files, progress_text, export_cache)
+        save_export_cache(output_dir, export_cache, exporter_class.OUTPUT_VERSION)
+        progress_dialog.hide()
         
-        # Reactivate the original design
+        # Reactivate the original design, which stays open for the whole batch
         try:
-            original_document = app.documents.open(active_data_file)
-            if original_document:
-                original_document.activate()
-                futil.log(f"Reactivated original design: {active_data_file.name}")
-        except Exception as reactivate_error:
-            futil.log(f"Warning: Could not reactivate original design: {str(reactivate_error)}")
+            activate_document(active_document)
+            futil.log(f"Reactivated original design: {active_data_file.name}")
+        except Exception:
+            # The document handle is no longer usable, so fall back to reopening the file
+            try:
+                original_document = app.documents.open(active_data_file)
+                if original_document:
+                    activate_document(original_document)
+                    futil.log(f"Reopened original design: {active_data_file.name}")
+            except Exception as reactivate_error:
+                futil.log(f"Warning: Could not reactivate original design: {str(reactivate_error)}")
         
         if progress_text:
-            progress_text.text = f"Completed! Successfully processed {successful}/{total_files} files."
+            if cancelled:
+                progress_text.text = f"Cancelled! Successfully processed {successful}/{total_files} files."
+            else:
+                progress_text.text = f"Completed! Successfully processed {successful}/{total_files} files."
+            progress_text.flush()
         
         futil.log(f"=== BATCH EXPORT COMPLETED ===")
         futil.log(f"Total files: {total_files}, Successful: {successful}")
@@ -407,12 +644,14 @@ def batch_export_to_kcl(project_folder, output_folder, progress_text=None):
     except Exception as error:
         error_msg = f"Batch export error: {str(error)}"
         futil.log(f"ERROR: {error_msg}")
+        if progress_dialog:
+            progress_dialog.hide()
         if progress_text:
             progress_text.text = f"Error: {str(error)}"
+            progress_text.flush()
         
         # Store the error
         if not hasattr(batch_export_to_kcl, 'last_error'):
             batch_export_to_kcl.last_error = error_msg
         
         return 0
-
@@ -1,20 +1,10 @@
 import adsk.core
 import adsk.fusion
 import os
-import sys
-import importlib.util
 from ...lib import fusionAddInUtils as futil
 from ... import config
+from .._kcl_loader import get_exporter_class
 
-# Add the script directory to Python path to import the KCLExporter
-script_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'fusion-kcl-export-script')
-if script_dir not in sys.path:
-    sys.path.append(script_dir)
-# Import the script module (Python treats hyphens in filenames as modules)
-spec = importlib.util.spec_from_file_location("fusion_kcl_export", os.path.join(script_dir, "fusion-kcl-export.py"))
-fusion_kcl_export = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(fusion_kcl_export)
-KCLExporter = fusion_kcl_export.KCLExporter
 app = adsk.core.Application.get()
 ui = app.userInterface
 
@@ -98,6 +88,12 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
     
     # Create browse button for file selection
     inputs.addBoolValueInput('browse_file', 'Browse...', False, '', True)
+    
+    # Create checkbox to merge runs of matching extrudes into one multi-sketch extrude
+    inputs.addBoolValueInput('group_extrudes', 'Group Matching Extrudes', True, '', False)
+    
+    # Create checkbox to start sketches on each plane from one shared variable
+    inputs.addBoolValueInput('share_sketch_planes', 'Share Sketch Planes', True, '', False)
 
     # TODO Connect to the events that are needed by this command.
     futil.add_handler(args.command.execute, command_execute, local_handlers=local_handlers)
@@ -118,6 +114,8 @@ def command_execute(args: adsk.core.CommandEventArgs):
     # Get a reference to your command's inputs.
     inputs = args.command.commandInputs
     output_path: adsk.core.StringValueCommandInput = inputs.itemById('output_path')
+    group_extrudes: adsk.core.BoolValueCommandInput = inputs.itemById('group_extrudes')
+    share_sketch_planes: adsk.core.BoolValueCommandInput = inputs.itemById('share_sketch_planes')
 
     # Get the active design
     design = app.activeProduct
@@ -128,18 +126,16 @@ def command_execute(args: adsk.core.CommandEventArgs):
     # Export to KCL using the real exporter
     try:
         # Create the exporter with clean output (no debug)
-        exporter = KCLExporter(debug_planes=False)
-        
-        # Export the design to KCL
-        kcl_content = exporter.export_design(design)
+        exporter = get_exporter_class()(debug_planes=False, group_extrudes=group_extrudes.value,
+                                        share_sketch_planes=share_sketch_planes.value)
         
         # Ensure the output path has .kcl extension
         if not output_path.value.lower().endswith('.kcl'):
             output_path.value += '.kcl'
         
-        # Write the KCL file
-        with open(output_path.value, 'w', encoding='utf-8') as f:
-            f.write(kcl_content)
+        # Export the design to KCL, writing each chunk to the file as it is generated;
+        # write_kcl_file only replaces an existing file once the export has finished
+        exporter.write_kcl_file(output_path.value, exporter.export_design_iter(design))
         
         ui.messageBox(f'Successfully exported to KCL: {output_path.value}')
     except Exception as e:
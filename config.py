@@ -10,6 +10,10 @@ import os
 # are ready to distribute it.
 DEBUG = True
 
+# When True the batch export also logs every file it finds in the project folder
+# and whether it will be exported or skipped. This is noisy for large folders.
+LOG_VERBOSE = False
+
 # Gets the name of the add-in from the name of the folder the py file is in.
 # This is used when defining unique internal names for various UI elements 
 # that need a unique name. It's also recommended to use a company name as 
@@ -0,0 +1 @@
+# Package marker so the add-in commands can import the exporter script directly.
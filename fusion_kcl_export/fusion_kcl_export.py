@@ -0,0 +1,1829 @@
+"""
+Fusion 360 to KCL Export Script
+
+This script exports Fusion 360 designs to KCL (KittyCAD Language) format.
+It attempts to preserve as much of the feature tree, timeline, parameters 
+and constraints as possible.
+"""
+
+import traceback
+import os
+import sys
+import io
+import itertools
+import re
+import math
+import collections
+import adsk.core
+import adsk.fusion
+
+# Initialize the global variables for the Application and UserInterface objects.
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+# Fusion length units mapped to the KCL unit name and the name used in debug comments
+_UNIT_ENUM_TO_KCL = {
+    adsk.fusion.DistanceUnits.InchDistanceUnits: ("in", "inches"),
+    adsk.fusion.DistanceUnits.MillimeterDistanceUnits: ("mm", "millimeters"),
+    adsk.fusion.DistanceUnits.CentimeterDistanceUnits: ("cm", "centimeters"),
+    adsk.fusion.DistanceUnits.MeterDistanceUnits: ("m", "meters"),
+    adsk.fusion.DistanceUnits.FootDistanceUnits: ("ft", "feet"),
+}
+_UNIT_STRING_TO_KCL = {
+    "in": ("in", "inches"), "inch": ("in", "inches"),
+    "mm": ("mm", "millimeters"), "millimeter": ("mm", "millimeters"),
+    "cm": ("cm", "centimeters"), "centimeter": ("cm", "centimeters"),
+    "m": ("m", "meters"), "meter": ("m", "meters"),
+    "ft": ("ft", "feet"), "foot": ("ft", "feet"),
+}
+
+# Boolean operation emitted for a combine feature's operation; anything else subtracts
+_COMBINE_OPERATION_NAMES = {
+    adsk.fusion.FeatureOperations.JoinFeatureOperation: "union",
+    adsk.fusion.FeatureOperations.CutFeatureOperation: "subtract",
+    adsk.fusion.FeatureOperations.IntersectFeatureOperation: "intersect",
+}
+
+# Readable extrude operation names for debug comments
+_EXTRUDE_OPERATION_NAMES = {
+    adsk.fusion.FeatureOperations.JoinFeatureOperation: "Join",
+    adsk.fusion.FeatureOperations.CutFeatureOperation: "Cut",
+    adsk.fusion.FeatureOperations.IntersectFeatureOperation: "Intersect",
+    adsk.fusion.FeatureOperations.NewBodyFeatureOperation: "NewBody",
+    adsk.fusion.FeatureOperations.NewComponentFeatureOperation: "NewComponent",
+}
+
+# Class type names looked up once instead of calling classType() for every comparison
+_OBJECT_COLLECTION_TYPE = adsk.core.ObjectCollection.classType()
+_PLANE_TYPE = adsk.core.Plane.classType()
+_DESIGN_TYPE = adsk.fusion.Design.classType()
+_BREP_FACE_TYPE = adsk.fusion.BRepFace.classType()
+_CONSTRUCTION_PLANE_TYPE = adsk.fusion.ConstructionPlane.classType()
+_EXTRUDE_FEATURE_TYPE = adsk.fusion.ExtrudeFeature.classType()
+_REVOLVE_FEATURE_TYPE = adsk.fusion.RevolveFeature.classType()
+_COMBINE_FEATURE_TYPE = adsk.fusion.CombineFeature.classType()
+_DISTANCE_EXTENT_TYPE = adsk.fusion.DistanceExtentDefinition.classType()
+_ANGLE_EXTENT_TYPE = adsk.fusion.AngleExtentDefinition.classType()
+_FULL_SWEEP_EXTENT_TYPE = adsk.fusion.FullSweepExtentDefinition.classType()
+
+
+# Segments shorter than this (in display units) are treated as zero length; lengths are
+# compared squared to avoid a square root per segment
+_LENGTH_TOLERANCE = 0.001
+_LENGTH_TOLERANCE_SQUARED = _LENGTH_TOLERANCE * _LENGTH_TOLERANCE
+
+# Fixed text around the end point of a straight profile segment
+_LINE_SEGMENT_START = "  |> line(endAbsolute = ["
+_LINE_SEGMENT_END = "], %)"
+
+# Templates for the arc and circle profile lines, filled in with formatted numbers
+_ARC_TEMPLATE = "  |> arc(angleStart = %s, angleEnd = %s, radius = %s, %%)"
+_CIRCLE_TEMPLATE = "  |> circle(center = [%s, %s], diameter = %s, %%)"
+
+# Sketch point attributes holding the ends of each curve type; circles have no ends, so
+# their center point is used for both
+_CURVE_START_POINT_ATTRIBUTES = {
+    'line': 'startSketchPoint', 'arc': 'startSketchPoint', 'spline': 'startSketchPoint',
+    'circle': 'centerSketchPoint',
+}
+_CURVE_END_POINT_ATTRIBUTES = {
+    'line': 'endSketchPoint', 'arc': 'endSketchPoint', 'spline': 'endSketchPoint',
+    'circle': 'centerSketchPoint',
+}
+
+# Origin planes by the axis (x, y, z) of their normal vector, and the reverse
+_PLANE_BY_NORMAL_AXIS = ("YZ", "XZ", "XY")
+_PLANE_NORMAL_AXIS = {"YZ": "X", "XZ": "Y", "XY": "Z"}
+
+# A normal component above this counts as aligned with that axis. Two components of a
+# unit vector can't both exceed it, so the largest component is the only candidate.
+_PLANE_NORMAL_THRESHOLD = 0.9
+
+# Runs of characters that are kept when building KCL variable names
+_NAME_WORD_PATTERN = re.compile(r'[a-zA-Z0-9]+')
+
+
+def _format_number(value: float) -> str:
+    """Format a geometry value for KCL with at most 6 decimals and no exponent notation."""
+    text = f"{value:.6f}".rstrip("0")
+    return text + "0" if text.endswith(".") else text
+
+
+def _entity_token(entity) -> str:
+    """Return an entity's token, interned so repeated tokens share one string in the lookup maps."""
+    return sys.intern(entity.entityToken)
+
+
+def _plane_name_for_normal(normal):
+    """Return the origin plane whose normal a vector is aligned with, or None for other orientations."""
+    components = (abs(normal.x), abs(normal.y), abs(normal.z))
+    axis = components.index(max(components))
+    if components[axis] > _PLANE_NORMAL_THRESHOLD:
+        return _PLANE_BY_NORMAL_AXIS[axis]
+    return None
+
+
+def _leftmost_point_index(points: list):
+    """Return the index of the leftmost point, or None if there are no points.
+    
+    Points whose x values are within 0.001 of the best so far count as level, and the
+    lower one wins.
+    """
+    best_index = None
+    for index, (x, y) in enumerate(points):
+        if best_index is None or x < best_x or (abs(x - best_x) < 0.001 and y < best_y):
+            best_index, best_x, best_y = index, x, y
+    return best_index
+
+
+def _simplify_polyline(points: list, tolerance: float) -> list:
+    """Simplify a polyline with the Ramer-Douglas-Peucker algorithm.
+    
+    Points closer than tolerance to the simplified polyline are dropped; the first and last
+    points are always kept.
+    """
+    if tolerance <= 0 or len(points) < 3:
+        return points
+    
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    ranges = [(0, len(points) - 1)]
+    while ranges:
+        first, last = ranges.pop()
+        start_x, start_y = points[first]
+        dx = points[last][0] - start_x
+        dy = points[last][1] - start_y
+        length_squared = dx * dx + dy * dy
+        
+        # Find the point furthest from the segment between the range ends
+        max_distance = 0.0
+        max_index = None
+        for i in range(first + 1, last):
+            offset_x = points[i][0] - start_x
+            offset_y = points[i][1] - start_y
+            t = (offset_x * dx + offset_y * dy) / length_squared if length_squared else 0.0
+            t = min(1.0, max(0.0, t))
+            distance = math.hypot(offset_x - t * dx, offset_y - t * dy)
+            if distance > max_distance:
+                max_distance = distance
+                max_index = i
+        
+        if max_index is not None and max_distance > tolerance:
+            keep[max_index] = True
+            ranges.append((first, max_index))
+            ranges.append((max_index, last))
+    
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+class KCLExporter:
+    """Main class for exporting Fusion 360 designs to KCL format."""
+    
+    # Fixed attribute storage; every attribute set by __init__ and reset() must be listed here
+    __slots__ = (
+        "debug_planes", "group_extrudes", "share_sketch_planes", "spline_tolerance",
+        "_buf", "_line_sep", "indent_level",
+        "_extrude_names", "_combine_count", "_recent_solid",
+        "body_to_feature_map", "feature_to_kcl_name",
+        "units", "_unit_scale", "_units_manager", "_safe_name_cache", "_plane_name_cache",
+        "current_sketch_plane", "_y_sign", "current_profile_position", "_sketch_plane_vars",
+        "_ids", "_feature_ids", "_xz_flip_logged",
+    )
+    
+    # Indent strings by indent level, grown on demand by add_line
+    _indent_cache = [""]
+    
+    # Version of the generated KCL; bump it whenever a change alters the output for the same
+    # design, so batch exports made by an older version are not treated as up to date
+    OUTPUT_VERSION = 1
+    
+    def __init__(self, debug_planes=False, group_extrudes=False, share_sketch_planes=False,
+                 spline_tolerance=_LENGTH_TOLERANCE):
+        self.debug_planes = debug_planes  # Enable detailed plane debugging
+        self.group_extrudes = group_extrudes  # Merge matching consecutive extrudes into one multi-sketch extrude
+        self.share_sketch_planes = share_sketch_planes  # Call startSketchOn once per plane and reuse it for every sketch
+        self.spline_tolerance = spline_tolerance  # Max deviation (display units) when dropping spline fit points; 0 keeps all
+        self.reset()
+    
+    def reset(self):
+        """Clear all per-design state so the exporter can be reused for another design."""
+        self._buf = io.StringIO()  # KCL text not yet handed out by drain_output
+        self._line_sep = ""  # Written before each line; a newline once the first line is out
+        self.indent_level = 0
+        self._extrude_names = []  # KCL variables of tracked extrudes, in creation order
+        self._combine_count = 0  # Boolean operations emitted by export_combine
+        self._recent_solid = None  # KCL variable of the last boolean result
+        self.body_to_feature_map = {}  # Maps BRepBody entity token to the KCL feature name that created it
+        self.feature_to_kcl_name = {}  # Maps Fusion feature entity token to KCL variable name
+        self.units = "mm"  # Will be set during export_design
+        self._unit_scale = None  # cm to display units factor, looked up once per export
+        self._units_manager = None  # Active design's units manager, looked up once per export
+        self._safe_name_cache = {}  # Maps Fusion names to KCL variable names
+        self._plane_name_cache = {}  # Maps plane entity tokens to KCL plane names
+        self.current_sketch_plane = None
+        self._y_sign = 1.0  # Y coordinate factor for the current sketch plane
+        self.current_profile_position = None
+        self._sketch_plane_vars = {}  # Maps plane names to their shared startSketchOn variable
+        self._ids = itertools.count(1)  # Source of get_unique_id values
+        self._feature_ids = {}  # Maps feature entity tokens to the IDs handed out by get_feature_id
+        self._xz_flip_logged = False
+        
+    def get_indent(self) -> str:
+        """Return the indent string for the current indent level."""
+        indents = self._indent_cache
+        indent_level = self.indent_level
+        while len(indents) <= indent_level:
+            indents.append("  " * len(indents))
+        return indents[indent_level]
+    
+    def add_line(self, line: str):
+        """Add a line to the KCL content with proper indentation."""
+        if self.indent_level:
+            line = self.get_indent() + line
+        buf = self._buf
+        buf.write(self._line_sep)
+        buf.write(line)
+        self._line_sep = "\n"
+    
+    def add_line_segment(self, end_x: float, end_y: float):
+        """Add a straight profile segment to the KCL content.
+        
+        Segments are the most common line in the output, so the text is written straight to
+        the output buffer from fixed pieces.
+        """
+        buf = self._buf
+        buf.write(self._line_sep)
+        buf.write(self.get_indent())
+        buf.write(_LINE_SEGMENT_START)
+        buf.write(_format_number(end_x))
+        buf.write(", ")
+        buf.write(_format_number(end_y))
+        buf.write(_LINE_SEGMENT_END)
+        self._line_sep = "\n"
+    
+    def add_comment(self, comment: str):
+        """Add a comment to the KCL content."""
+        # Write the pieces straight to the buffer rather than building the line first
+        buf = self._buf
+        buf.write(self._line_sep)
+        buf.write(self.get_indent())
+        buf.write("// ")
+        buf.write(comment)
+        self._line_sep = "\n"
+    
+    def detect_document_units(self) -> str:
+        """Detect the current document units using Fusion API."""
+        try:
+            # Get the active design
+            design = app.activeProduct
+            if not design or design.objectType != _DESIGN_TYPE:
+                if self.debug_planes:
+                    self.add_comment("No active design found, defaulting to mm")
+                return "mm"  # Default fallback
+            
+            # Try fusionUnitsManager first (returns enum values)
+            try:
+                fusion_units_manager = design.fusionUnitsManager
+                length_unit_enum = fusion_units_manager.distanceDisplayUnits
+                if self.debug_planes:
+                    self.add_comment(f"fusionUnitsManager.distanceDisplayUnits enum: {length_unit_enum}")
+                
+                # Convert enum values to KCL unit strings
+                unit = _UNIT_ENUM_TO_KCL.get(length_unit_enum)
+                if unit:
+                    if self.debug_planes:
+                        self.add_comment(f"Detected {unit[1]} from enum")
+                    return unit[0]
+                if self.debug_planes:
+                    self.add_comment(f"Unsupported enum value {length_unit_enum}, defaulting to mm")
+                return "mm"
+                    
+            except Exception as e1:
+                if self.debug_planes:
+                    self.add_comment(f"fusionUnitsManager failed: {str(e1)}")
+                # Fallback to regular unitsManager
+                try:
+                    units_manager = design.unitsManager
+                    length_unit_string = units_manager.defaultLengthUnits
+                    if self.debug_planes:
+                        self.add_comment(f"unitsManager.defaultLengthUnits: '{length_unit_string}'")
+                    
+                    # Convert string values to KCL unit strings
+                    unit = _UNIT_STRING_TO_KCL.get(length_unit_string)
+                    if unit:
+                        if self.debug_planes:
+                            self.add_comment(f"Detected {unit[1]} from string")
+                        return unit[0]
+                    if self.debug_planes:
+                        self.add_comment(f"Unsupported string unit '{length_unit_string}', defaulting to mm")
+                    return "mm"
+                        
+                except Exception as e2:
+                    if self.debug_planes:
+                        self.add_comment(f"unitsManager also failed: {str(e2)}")
+                    return "mm"
+                
+        except Exception as e:
+            # If detection fails, default to mm
+            if self.debug_planes:
+                self.add_comment(f"Unit detection failed: {str(e)}, defaulting to mm")
+            return "mm"
+    
+    def export_design(self, design: adsk.fusion.Design) -> str:
+        """Export a Fusion 360 design to KCL format."""
+        return "".join(self.export_design_iter(design))
+    
+    @staticmethod
+    def write_kcl_file(filename: str, kcl_chunks):
+        """Write KCL text, or an iterable of KCL chunks, to a file as UTF-8.
+        
+        The chunks are streamed into a temporary file next to filename, which only replaces
+        filename once every chunk has been written, so a failed export (such as a generator
+        from export_design_iter raising part-way) leaves any previous file untouched. The
+        encoded bytes go straight to the file descriptor, skipping the text I/O layer. Line
+        endings are written as-is on every platform.
+        """
+        if isinstance(kcl_chunks, str):
+            kcl_chunks = (kcl_chunks,)
+        temp_filename = filename + '.tmp'
+        fd = os.open(temp_filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o644)
+        try:
+            try:
+                for chunk in kcl_chunks:
+                    data = memoryview(chunk.encode('utf-8'))
+                    # os.write may write less than it was given, so loop until the chunk is out
+                    while data:
+                        data = data[os.write(fd, data):]
+            finally:
+                os.close(fd)
+            os.replace(temp_filename, filename)
+        except BaseException:
+            try:
+                os.remove(temp_filename)
+            except OSError:
+                pass
+            raise
+    
+    def export_design_iter(self, design: adsk.fusion.Design):
+        """Export a Fusion 360 design to KCL format, yielding the output in chunks.
+        
+        A chunk is produced for the header and parameters and then for each sketch and
+        feature, so callers can write the KCL out while the export is still running.
+        """
+        self.reset()
+        
+        # Detect units first
+        self.units = self.detect_document_units()
+        self._unit_scale = self.get_display_unit_scale()
+        
+        # Add header comment and settings (like bone-plate example)
+        self.add_comment("Generated from Fusion 360")
+        self.add_comment(f"Design: {design.parentDocument.name}")
+        self.add_line("")
+        
+        # Add KCL settings
+        self.add_line("// Set units")
+        self.add_line(f"@settings(defaultLengthUnit = {self.units})")
+        self.add_line("")
+        
+        # Export parameters
+        self.export_parameters(design)
+        yield self.drain_output()
+        
+        # Process the root component
+        root_component = design.rootComponent
+        for _ in self.iter_component_export(root_component):
+            chunk = self.drain_output()
+            if chunk:
+                yield chunk
+    
+    def drain_output(self) -> str:
+        """Return the KCL text added since the last call and clear the output buffer.
+        
+        Lines are newline separated, so every chunk after the first starts with a newline.
+        """
+        buf = self._buf
+        chunk = buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+        return chunk
+    
+    def export_parameters(self, design: adsk.fusion.Design):
+        """Export design parameters to KCL format."""
+        try:
+            # Get all parameters in the design
+            all_params = design.allParameters
+            param_count = all_params.count
+            
+            if param_count == 0:
+                if self.debug_planes:
+                    self.add_comment("No parameters found in design")
+                return
+            
+            self.add_comment("=== PARAMETERS ===")
+            
+            # Also get user parameters specifically
+            user_param_collection = design.userParameters
+            item = user_param_collection.item
+            user_param_names = frozenset(item(i).name for i in range(user_param_collection.count))
+            
+            # Separate user parameters from model parameters by name in a single pass,
+            # keeping each name so it is only read from Fusion once
+            user_params = []
+            model_params = []
+            item = all_params.item
+            for i in range(param_count):
+                param = item(i)
+                param_name = param.name
+                if param_name in user_param_names:
+                    user_params.append((param, param_name))
+                else:
+                    model_params.append((param, param_name))
+            
+            # Export user parameters first (these are the important ones)
+            if user_params:
+                self.add_comment("User Parameters:")
+                for param, param_name in user_params:
+                    self.export_parameter(param, param_name)
+                self.add_line("")
+            
+            # Export model parameters if debug mode is enabled
+            if model_params and self.debug_planes:
+                self.add_comment("Model Parameters (auto-generated):")
+                for param, param_name in model_params:
+                    self.export_parameter(param, param_name)
+                self.add_line("")
+            
+            if not user_params and not self.debug_planes:
+                self.add_comment("No user parameters defined")
+                self.add_line("")
+                
+        except Exception as e:
+            if self.debug_planes:
+                self.add_comment(f"Error exporting parameters: {str(e)}")
+            self.add_line("")
+    
+    def export_parameter(self, param, param_name: str = None):
+        """Export a single parameter to KCL format."""
+        try:
+            if param_name is None:
+                param_name = param.name
+            param_value = param.value
+            param_units = getattr(param, 'unit', None) or ""
+            param_comment = getattr(param, 'comment', None) or ""
+            param_expression = getattr(param, 'expression', None) or str(param_value)
+            
+            # Clean up parameter name for KCL (replace invalid characters)
+            kcl_param_name = self.get_safe_name(param_name)
+            
+            # Format the parameter value
+            if param_units:
+                # Convert units if needed
+                if param_units in ['cm', 'mm', 'in', 'm', 'ft']:
+                    # Length parameter - convert to display units
+                    display_value = self.convert_internal_to_display_units(param_value)
+                    param_line = f"{kcl_param_name} = {display_value}"
+                else:
+                    # Other units (angles, etc.) - use as is
+                    param_line = f"{kcl_param_name} = {param_value}"
+            else:
+                # Dimensionless parameter
+                param_line = f"{kcl_param_name} = {param_value}"
+            
+            # Add comment with original name and description if different
+            if param_comment or param_name != kcl_param_name:
+                comment_parts = []
+                if param_name != kcl_param_name:
+                    comment_parts.append(f"Original: {param_name}")
+                if param_comment:
+                    comment_parts.append(param_comment)
+                if param_units:
+                    comment_parts.append(f"Units: {param_units}")
+                if param_expression != str(param_value):
+                    comment_parts.append(f"Expression: {param_expression}")
+                
+                if comment_parts:
+                    param_line += f"  // {' | '.join(comment_parts)}"
+            
+            self.add_line(param_line)
+            
+        except Exception as e:
+            if self.debug_planes:
+                self.add_comment(f"Error exporting parameter {param.name}: {str(e)}")
+    
+    def export_component(self, component: adsk.fusion.Component):
+        """Export a Fusion 360 component to KCL."""
+        for _ in self.iter_component_export(component):
+            pass
+    
+    def iter_component_export(self, component: adsk.fusion.Component):
+        """Export a Fusion 360 component to KCL, yielding after each sketch and feature."""
+        sketches = component.sketches
+        sketch_count = sketches.count
+        features = component.features
+        feature_count = features.count
+        self.add_comment(f"Component: {component.name}")
+        self.add_comment(f"Found {sketch_count} sketches and {feature_count} features")
+        self.add_line("")
+        
+        # Export sketches FIRST - features depend on them
+        if sketch_count > 0:
+            self.add_comment("=== SKETCHES ===")
+            item = sketches.item
+            for i in range(sketch_count):
+                sketch = item(i)
+                if self.debug_planes:
+                    self.add_comment(f"Processing sketch {i+1}/{sketch_count}: {sketch.name}")
+                self.export_sketch(sketch)
+                yield
+        
+        # Export features AFTER sketches
+        if feature_count > 0:
+            self.add_comment("=== FEATURES ===")
+            
+            # Read each feature from the API once, for both the grouping plan and the export
+            item = features.item
+            features = [item(i) for i in range(feature_count)]
+            
+            # Grouped extrudes are exported together at the group's first feature; the
+            # other features in the group map to an empty list and are skipped
+            extrude_groups = self.plan_extrude_groups(features) if self.group_extrudes else {}
+            
+            # Process all features using proper Fusion 360 API
+            for i, feature in enumerate(features):
+                extrude_group = extrude_groups.get(i)
+                if extrude_group is not None:
+                    if extrude_group:
+                        self.export_extrude_group(extrude_group)
+                        yield
+                    continue
+                if self.debug_planes:
+                    self.add_comment(f"Processing feature {i+1}/{feature_count}: {feature.name} ({feature.objectType})")
+                self.export_feature(feature)
+                yield
+    
+    def plan_extrude_groups(self, features: list) -> dict:
+        """Find runs of consecutive extrudes that can be exported as a single multi-sketch extrude.
+        
+        features is the component's features in timeline order. Extrudes are grouped when they
+        have a distance extent, the same sketch plane, distance and operation. Returns a dict
+        mapping the index of each group's first feature to the group's (extrude, sketch, distance)
+        entries, and the other indices in the group to an empty list.
+        """
+        planned = []
+        for feature in features:
+            feature_type = feature.objectType
+            if feature_type == _COMBINE_FEATURE_TYPE:
+                # export_combine deduces its operands from the individual extrude names
+                return {}
+            group_key, sketch, distance = None, None, None
+            if feature_type == _EXTRUDE_FEATURE_TYPE:
+                group_key, sketch, distance = self.extrude_group_key(feature)
+            planned.append((group_key, feature, sketch, distance))
+        
+        extrude_groups = {}
+        for group_key, run in itertools.groupby(enumerate(planned), key=lambda entry: entry[1][0]):
+            run = list(run)
+            if group_key is None or len(run) < 2:
+                continue
+            extrude_groups[run[0][0]] = [entry[1:] for _, entry in run]
+            extrude_groups.update((i, []) for i, _ in run[1:])
+        return extrude_groups
+    
+    def extrude_group_key(self, extrude: adsk.fusion.ExtrudeFeature) -> tuple:
+        """Return the (group key, sketch, raw distance) used to group an extrude.
+        
+        Returns (None, None, None) if the extrude can't be grouped.
+        """
+        try:
+            extent_one = extrude.extentOne
+            if extent_one.objectType != _DISTANCE_EXTENT_TYPE:
+                return None, None, None
+            
+            profile_obj = extrude.profile
+            profile = self.get_first_profile(profile_obj) if profile_obj else None
+            sketch = getattr(profile, 'parentSketch', None) if profile else None
+            if not sketch:
+                return None, None, None
+            
+            # Keep the distance read here so export_extrude_group doesn't read it again
+            raw_distance = extent_one.distance.value
+            group_key = (_entity_token(sketch.referencePlane), round(raw_distance, 9), extrude.operation)
+            return group_key, sketch, raw_distance
+        except RuntimeError:
+            # The API reports failures on broken entities as RuntimeError; such extrudes
+            # are left to export_extrude
+            return None, None, None
+    
+    def get_first_profile(self, profile_obj):
+        """Return a feature's profile, or the first one if it has a collection of them.
+        
+        Returns None if the collection is empty.
+        """
+        # Handle both single profile and ObjectCollection
+        if getattr(profile_obj, 'objectType', None) == _OBJECT_COLLECTION_TYPE:
+            # Multiple profiles - use the first one
+            return profile_obj.item(0) if profile_obj.count > 0 else None
+        return profile_obj
+    
+    def export_extrude_group(self, extrude_group: list):
+        """Export a group of matching extrudes from plan_extrude_groups as one extrude of all their sketches."""
+        extrudes = [extrude for extrude, _, _ in extrude_group]
+        self.add_comment(f"Extrude: {', '.join(extrude.name for extrude in extrudes)}")
+        
+        try:
+            sketches = [sketch for _, sketch, _ in extrude_group]
+            # Keep each sketch once, in feature order
+            sketch_names = list(dict.fromkeys(self.get_safe_name(sketch.name) for sketch in sketches))
+            sketch_plane = self.get_plane_name(sketches[0].referencePlane)
+            
+            distance = self.convert_internal_to_display_units(extrude_group[0][2])
+            adjusted_distance = self.adjust_extrude_distance(distance, sketch_plane)
+            extrude_var_name = f"extrude{self.get_unique_id()}"
+            self.add_line(f"{extrude_var_name} = extrude([{', '.join(sketch_names)}], length = {_format_number(adjusted_distance)})")
+            
+            # Every grouped feature's bodies come from the one KCL extrude
+            for extrude in extrudes:
+                self.track_extrude_bodies(extrude, extrude_var_name)
+        except Exception as e:
+            self.add_comment(f"Error processing extrude: {str(e)}")
+        
+        self.add_line("")
+    
+    def export_sketch(self, sketch: adsk.fusion.Sketch):
+        """Export a Fusion 360 sketch to KCL."""
+        sketch_name = sketch.name
+        self.add_comment(f"Sketch: {sketch_name}")
+        
+        # Get the sketch plane
+        plane_name = self.get_plane_name(sketch.referencePlane)
+        sketch_var_name = self.get_safe_name(sketch_name)
+        
+        # Store current sketch plane for coordinate conversion; for XZ plane, the Y
+        # coordinate is flipped to match KCL coordinate system
+        self.current_sketch_plane = plane_name
+        self._y_sign = -1.0 if plane_name == "XZ" else 1.0
+        
+        # Reset profile tracking for this sketch
+        self.current_profile_position = None
+        
+        # Collect the curves once; the collection handles and counts are only read here. An
+        # empty sketch is caught by the single overall count before any of them are read
+        sketch_curves = sketch.sketchCurves
+        all_curves = self.collect_sketch_curves(sketch_curves) if sketch_curves.count else []
+        total_curves = len(all_curves)
+        
+        if self.debug_planes:
+            curve_counts = collections.Counter(curve_type for curve_type, _ in all_curves)
+            self.add_comment(f"Sketch has {total_curves} total curves (lines: {curve_counts['line']}, arcs: {curve_counts['arc']}, circles: {curve_counts['circle']})")
+        
+        if total_curves == 0:
+            self.add_comment(f"Skipping {sketch_name} - no curves found")
+            return
+        
+        # Create the sketch and profile in one chain
+        if self.share_sketch_planes:
+            plane_var_name = self._sketch_plane_vars.get(plane_name)
+            if plane_var_name is None:
+                # Safe names never contain underscores, so this can't clash with a sketch
+                plane_var_name = self._sketch_plane_vars[plane_name] = f"plane_{plane_name}"
+                self.add_line(f'{plane_var_name} = startSketchOn({plane_name})')
+            self.add_line(f'{sketch_var_name} = {plane_var_name}')
+        else:
+            self.add_line(f'{sketch_var_name} = startSketchOn({plane_name})')
+        self.indent_level += 1
+        
+        # Export sketch curves in the correct order (this will handle the starting point)
+        has_circles = self.export_sketch_curve(all_curves)
+        
+        # Only close the profile if it's not already closed (circles are self-closing)
+        if not has_circles:
+            self.add_line("|> close(%)")
+        
+        self.indent_level -= 1
+        self.add_line("")
+    
+    def collect_sketch_curves(self, curves) -> list:
+        """Collect a sketch's lines, arcs, circles and splines as (type, curve) pairs."""
+        all_curves = []
+        for curve_type, collection in (('line', curves.sketchLines),
+                                       ('arc', curves.sketchArcs),
+                                       ('circle', curves.sketchCircles),
+                                       ('spline', curves.sketchFittedSplines)):
+            # Read count and the item method once rather than on every iteration
+            item = collection.item
+            all_curves.extend([(curve_type, item(i)) for i in range(collection.count)])
+        return all_curves
+    
+    def export_sketch_curve(self, all_curves):
+        """Export sketch curves collected by collect_sketch_curves to KCL in the correct order."""
+        # Circles are typically standalone, not part of profiles
+        has_circles = any(curve_type == 'circle' for curve_type, _ in all_curves)
+        
+        # Sort curves by their order in the sketch profile, keeping the endpoints read for it
+        curve_endpoints = {}
+        sorted_curves = self.sort_curves_by_connectivity(all_curves, curve_endpoints)
+        
+        if not sorted_curves:
+            return has_circles
+        
+        # Get the starting point from the first curve
+        first_curve_type, first_curve = sorted_curves[0]
+        if first_curve_type == 'circle':
+            # For circles, use center point
+            start_sketch_point = getattr(first_curve, 'centerSketchPoint', None)
+        else:
+            # For other curves, use start point
+            start_sketch_point = getattr(first_curve, 'startSketchPoint', None)
+        start_point_geom = start_sketch_point.geometry if start_sketch_point is not None else None
+        
+        if start_point_geom:
+            start_point = self.convert_point_2d(start_point_geom)
+            self.add_line(f"|> startProfile(at = [{_format_number(start_point[0])}, {_format_number(start_point[1])}], %)")
+            # Track the current position in the profile
+            self.current_profile_position = start_point
+        else:
+            # Fallback
+            self.add_line(f"|> startProfile(at = [0.0, 0.0], %)")
+            self.current_profile_position = (0.0, 0.0)
+        
+        # Export curves in the correct order
+        for i, (curve_type, curve) in enumerate(sorted_curves):
+            if curve_type == 'line':
+                self.export_line(curve, curve_endpoints.get(id(curve)))
+            elif curve_type == 'arc':
+                self.export_arc(curve)
+            elif curve_type == 'circle':
+                self.export_circle(curve)
+            elif curve_type == 'spline':
+                self.export_spline(curve)
+        
+        return has_circles
+    
+    def export_line(self, line: adsk.fusion.SketchLine, endpoints=None):
+        """Export a sketch line to KCL.
+        
+        endpoints is the line's (start, end) centimeter coordinates if they have already been
+        read, which saves reading them from the API again.
+        """
+        if endpoints is not None and not self.debug_planes:
+            (start_x, start_y), (end_x, end_y) = self.convert_coordinates_2d(endpoints)
+        else:
+            start_x, start_y = self.convert_point_2d(line.startSketchPoint.geometry)
+            end_x, end_y = self.convert_point_2d(line.endSketchPoint.geometry)
+        
+        # Check for zero-length lines
+        tolerance = _LENGTH_TOLERANCE
+        dx = end_x - start_x
+        dy = end_y - start_y
+        
+        if dx * dx + dy * dy < _LENGTH_TOLERANCE_SQUARED:
+            if self.debug_planes:
+                self.add_comment(f"Skipping zero-length line: [{start_x}, {start_y}] -> [{end_x}, {end_y}]")
+            return
+        
+        # Check if this endpoint is the same as our current position (duplicate endpoint)
+        if self.current_profile_position is not None:
+            current_x, current_y = self.current_profile_position
+            if abs(end_x - current_x) < tolerance and abs(end_y - current_y) < tolerance:
+                if self.debug_planes:
+                    self.add_comment(f"Skipping duplicate endpoint: [{end_x}, {end_y}] (already at [{current_x}, {current_y}])")
+                return
+        
+        # Use KCL line function with proper labeled arguments (like the bone-plate example)
+        self.add_line_segment(end_x, end_y)
+        
+        # Update current position
+        self.current_profile_position = (end_x, end_y)
+    
+    def export_arc(self, arc: adsk.fusion.SketchArc):
+        """Export a sketch arc to KCL."""
+        # Only the end point is needed, to track the current profile position
+        end_x, end_y = self.convert_point_2d(arc.endSketchPoint.geometry)
+        
+        # Get arc geometry to access the radius and the start and end angles (in radians)
+        arc_geometry = arc.geometry
+        radius = self.convert_internal_to_display_units(arc_geometry.radius)
+        
+        # Convert to degrees for KCL, making the end angle greater than the start angle
+        # when the arc crosses 0 degrees
+        start_angle_deg = math.degrees(arc_geometry.startAngle)
+        end_angle_deg = math.degrees(arc_geometry.endAngle)
+        if end_angle_deg < start_angle_deg:
+            end_angle_deg += 360
+        
+        # Use arc syntax from bone-plate example - need start and end angles
+        self.add_line(_ARC_TEMPLATE % (_format_number(start_angle_deg), _format_number(end_angle_deg),
+                                       _format_number(radius)))
+        
+        # Update current position to arc end point
+        self.current_profile_position = (end_x, end_y)
+    
+    def export_circle(self, circle: adsk.fusion.SketchCircle):
+        """Export a sketch circle to KCL."""
+        center = circle.centerSketchPoint.geometry
+        radius = circle.radius
+        
+        center_x, center_y = self.convert_point_2d(center)
+        radius_value = self.convert_internal_to_display_units(radius)
+        
+        # For circles, use the correct KCL syntax (center and radius/diameter)
+        diameter_value = radius_value * 2
+        self.add_line(_CIRCLE_TEMPLATE % (_format_number(center_x), _format_number(center_y),
+                                          _format_number(diameter_value)))
+        
+        # For circles, the current position remains at the center (circles are complete shapes)
+        self.current_profile_position = (center_x, center_y)
+    
+    def export_spline(self, spline: adsk.fusion.SketchFittedSpline):
+        """Export a sketch spline to KCL (simplified as connected lines)."""
+        # For now, approximate splines as a series of line segments
+        # This is a simplification - KCL may have better spline support
+        points = self.convert_points_2d([point.geometry for point in spline.fitPoints])
+        # Drop fit points that the line segments would pass within tolerance of anyway
+        points = _simplify_polyline(points, self.spline_tolerance)
+        
+        # Create line segments between consecutive points
+        end = None
+        for (start_x, start_y), (end_x, end_y) in zip(points, points[1:]):
+            # Check for zero-length segments in splines too
+            dx = end_x - start_x
+            dy = end_y - start_y
+            
+            if dx * dx + dy * dy >= _LENGTH_TOLERANCE_SQUARED:
+                self.add_line_segment(end_x, end_y)
+                end = (end_x, end_y)
+        
+        # Update current position to the last segment written
+        if end is not None:
+            self.current_profile_position = end
+    
+    def export_feature(self, feature):
+        """Export a Fusion 360 feature to KCL."""
+        # Add more feature types to _FEATURE_EXPORTERS as needed
+        export_method = _FEATURE_EXPORTERS.get(feature.objectType)
+        if export_method:
+            export_method(self, feature)
+    
+    def extrude_distance_extent(self, extent) -> float:
+        """Return the extrude distance for a distance extent."""
+        raw_distance = extent.distance.value
+        if self.debug_planes:
+            self.add_comment(f"Raw extrude distance (cm): {raw_distance}")
+        return self.convert_internal_to_display_units(raw_distance)
+    
+    def extrude_through_all_extent(self, extent) -> float:
+        """Return the stand-in extrude distance for a through-all extent."""
+        # For through-all, we'll use a default distance
+        self.add_comment("Note: Through-all extent converted to 100 units")
+        return 100.0  # Default 100 units
+    
+    def extrude_to_entity_extent(self, extent) -> float:
+        """Return the stand-in extrude distance for a to-entity extent."""
+        # For to-entity, we'll use a default distance
+        self.add_comment("Note: To-entity extent converted to 50 units")
+        return 50.0  # Default 50 units
+    
+    def extrude_symmetric_extent(self, extent) -> float:
+        """Return the extrude distance for a symmetric extent."""
+        # For symmetric extent, get the distance and use it
+        distance = self.convert_internal_to_display_units(extent.distance.value)
+        self.add_comment("Note: Symmetric extent - using total distance")
+        return distance
+    
+    def extrude_two_sides_extent(self, extent) -> float:
+        """Return the extrude distance for a two-sided extent, using the first side."""
+        # For two-sided extent, use the first side distance
+        distance = self.convert_internal_to_display_units(extent.distanceOne.value)
+        self.add_comment("Note: Two-sided extent - using first side distance only")
+        return distance
+    
+    def export_extrude(self, extrude: adsk.fusion.ExtrudeFeature):
+        """Export an extrude feature to KCL."""
+        self.add_comment(f"Extrude: {extrude.name}")
+        
+        try:
+            # Get the primary extent (extentOne)
+            extent_one = extrude.extentOne
+            distance = None
+            
+            # Handle different extent types
+            extent_type = extent_one.objectType
+            extent_method = _EXTRUDE_EXTENT_DISTANCES.get(extent_type)
+            if extent_method:
+                distance = extent_method(self, extent_one)
+            else:
+                # Log the actual extent type for debugging
+                self.add_comment(f"Unsupported extent type: {extent_type}")
+                distance = 10.0  # Default fallback distance
+            
+            if distance is not None:
+                # Find the associated sketch/profile
+                profile_obj = extrude.profile
+                sketch_plane = None
+                
+                if profile_obj:
+                    profile = self.get_first_profile(profile_obj)
+                    if profile is None:
+                        self.add_comment("Warning: Empty profile collection")
+                    else:
+                        extrude_var_name = f"extrude{self.get_unique_id()}"
+                        parent_sketch = getattr(profile, 'parentSketch', None)
+                        if parent_sketch:
+                            sketch_name = self.get_safe_name(parent_sketch.name)
+                            sketch_plane = self.get_plane_name(parent_sketch.referencePlane)
+                            
+                            # Adjust extrude distance for coordinate system differences
+                            adjusted_distance = self.adjust_extrude_distance(distance, sketch_plane)
+                            self.add_line(f"{extrude_var_name} = {sketch_name} |> extrude(length = {_format_number(adjusted_distance)})")
+                            
+                            # Track bodies created by this extrude
+                            self.track_extrude_bodies(extrude, extrude_var_name)
+                        else:
+                            self.add_line(f"{extrude_var_name} = sketch |> extrude(length = {_format_number(distance)})")
+                else:
+                    self.add_comment("Warning: No profile found for extrude")
+            else:
+                self.add_comment("Warning: Unsupported extent type")
+                
+        except Exception as e:
+            self.add_comment(f"Error processing extrude: {str(e)}")
+        
+        self.add_line("")
+    
+    def export_revolve(self, revolve: adsk.fusion.RevolveFeature):
+        """Export a revolve feature to KCL."""
+        self.add_comment(f"Revolve: {revolve.name}")
+        
+        try:
+            # Get the primary extent (extentDefinition)
+            extent_def = revolve.extentDefinition
+            angle = None
+            
+            # Handle different extent types
+            extent_type = extent_def.objectType
+            if extent_type == _ANGLE_EXTENT_TYPE:
+                angle = math.degrees(extent_def.angle.value)
+            elif extent_type == _FULL_SWEEP_EXTENT_TYPE:
+                angle = 360.0  # Full revolution
+                self.add_comment("Note: Full sweep converted to 360 degrees")
+            
+            if angle is not None:
+                # Find the associated sketch/profile
+                profile_obj = revolve.profile
+                if profile_obj:
+                    profile = self.get_first_profile(profile_obj)
+                    if profile is None:
+                        self.add_comment("Warning: Empty profile collection")
+                    else:
+                        # Both profile kinds revolve the same way, falling back to a generic name
+                        parent_sketch = getattr(profile, 'parentSketch', None)
+                        sketch_name = self.get_safe_name(parent_sketch.name) if parent_sketch else "sketch"
+                        revolve_var_name = f"revolve{self.get_unique_id()}"
+                        self.add_line(f"{revolve_var_name} = {sketch_name} |> revolve(axis = Y, angle = {_format_number(angle)})")
+                else:
+                    self.add_comment("Warning: No profile found for revolve")
+            else:
+                self.add_comment("Warning: Unsupported revolve extent type")
+                
+        except Exception as e:
+            self.add_comment(f"Error processing revolve: {str(e)}")
+        
+        self.add_line("")
+    
+    def export_combine(self, combine: adsk.fusion.CombineFeature):
+        """Export a combine feature to KCL using logical deduction since Fusion API body access fails."""
+        self.add_comment(f"Combine: {combine.name}")
+        
+        try:
+            # Get the operation type
+            operation_name = "subtract"  # Default
+            try:
+                operation_name = _COMBINE_OPERATION_NAMES.get(combine.operation, "subtract")
+                if self.debug_planes:
+                    self.add_comment(f"Boolean operation: {operation_name}")
+            except Exception as op_error:
+                self.add_comment(f"Could not get operation type: {str(op_error)}")
+            
+            # Since Fusion API body access fails consistently, use logical deduction
+            # Based on typical CAD workflow patterns
+            if self.debug_planes:
+                self.add_comment("Using logical deduction for combine operation (Fusion API body access unreliable)")
+            
+            # Count how many combines we've processed so far
+            combine_count = self._combine_count
+            
+            if self.debug_planes:
+                self.add_comment(f"This is combine operation #{combine_count + 1}")
+            
+            # Get all extrude names in order
+            extrude_names = self._extrude_names
+            
+            if self.debug_planes:
+                self.add_comment(f"Available extrudes: {extrude_names}")
+            
+            # Logical deduction based on typical CAD patterns:
+            # - First extrude creates main body
+            # - Subsequent extrudes create features to be subtracted
+            # - Combines typically subtract newer features from older results
+            
+            target_kcl_name = None
+            tool_kcl_name = None
+            
+            if combine_count == 0 and len(extrude_names) >= 2:
+                # First combine: main body (extrude1) - first feature (extrude2)
+                target_kcl_name = extrude_names[0]  # extrude1
+                tool_kcl_name = extrude_names[1]    # extrude2
+                self.add_comment(f"First combine: {target_kcl_name} - {tool_kcl_name}")
+                
+            else:
+                # For all subsequent combines: most recent result - next available extrude
+                # Find the most recent solid
+                recent_solid = self._recent_solid
+                
+                # Find the next extrude to subtract (the one after the already used ones).
+                # Each combine takes the first unused extrude as its tool and the list only
+                # grows at the end, so the main body and the first combine_count tools are
+                # exactly the used ones
+                used_count = combine_count + 1 if combine_count else 0
+                
+                if self.debug_planes:
+                    self.add_comment(f"Used extrudes so far: {sorted(extrude_names[:used_count])}")
+                
+                # Find the first unused extrude (excluding the main body extrude1)
+                unused_extrudes = extrude_names[max(used_count, 1):]
+                
+                if recent_solid and unused_extrudes:
+                    target_kcl_name = recent_solid
+                    tool_kcl_name = unused_extrudes[0]  # First unused extrude
+                    self.add_comment(f"Combine #{combine_count + 1}: {target_kcl_name} - {tool_kcl_name}")
+                else:
+                    self.add_comment(f"Could not find unused extrudes. Recent solid: {recent_solid}, Unused: {unused_extrudes}")
+            
+            # Generate the boolean operation if we have deduced the parameters
+            if target_kcl_name and tool_kcl_name:
+                solid_var_name = f"solid{self.get_unique_id().zfill(3)}"
+                
+                if operation_name == "subtract":
+                    self.add_line(f"{solid_var_name} = {operation_name}({target_kcl_name}, tools = {tool_kcl_name})")
+                else:
+                    self.add_line(f"{solid_var_name} = {operation_name}({target_kcl_name}, {tool_kcl_name})")
+                self._combine_count += 1
+                self._recent_solid = solid_var_name
+                
+                if self.debug_planes:
+                    self.add_comment(f"SUCCESS: Generated logical boolean operation")
+                
+            else:
+                self.add_comment("Could not deduce combine parameters - SKIPPING")
+                if not target_kcl_name:
+                    self.add_comment("  Could not determine target")
+                if not tool_kcl_name:
+                    self.add_comment("  Could not determine tool")
+                
+        except Exception as e:
+            self.add_comment(f"Error in combine processing: {str(e)}")
+            self.add_comment("SKIPPING BOOLEAN OPERATION due to error")
+        
+        self.add_line("")
+    
+    def find_body_source_feature(self, body):
+        """Find the source feature that created a body."""
+        try:
+            # Try to get the body's creation feature
+            feature = getattr(body, 'createdBy', None)
+            if feature:
+                object_type = feature.objectType
+                if object_type == _EXTRUDE_FEATURE_TYPE:
+                    return f"extrude{self.get_feature_id(feature)}"
+                elif object_type == _REVOLVE_FEATURE_TYPE:
+                    return f"revolve{self.get_feature_id(feature)}"
+                else:
+                    # For other feature types, use a generic name
+                    return f"feature{self.get_feature_id(feature)}"
+            else:
+                return None
+        except:
+            return None
+    
+    def get_feature_id(self, feature) -> str:
+        """Get a consistent ID for a feature."""
+        # Number features by entity token; hashing the token was neither stable between
+        # sessions nor free of collisions
+        try:
+            feature_token = _entity_token(feature)
+        except:
+            return self.get_unique_id()
+        feature_ids = self._feature_ids
+        try:
+            return feature_ids[feature_token]
+        except KeyError:
+            feature_id = feature_ids[feature_token] = str(len(feature_ids) + 1)
+            return feature_id
+    
+    def get_plane_name(self, plane) -> str:
+        """Get the KCL plane name for a Fusion 360 reference plane."""
+        if self.debug_planes:
+            # Debug exports log the plane detection for every sketch
+            return self.detect_plane_name(plane)
+        
+        try:
+            plane_token = _entity_token(plane)
+        except:
+            return self.detect_plane_name(plane)
+        try:
+            return self._plane_name_cache[plane_token]
+        except KeyError:
+            plane_name = self._plane_name_cache[plane_token] = self.detect_plane_name(plane)
+            return plane_name
+    
+    def detect_plane_name(self, plane) -> str:
+        """Work out the KCL plane name for a reference plane from its geometry."""
+        try:
+            # Add debugging information about the plane (if enabled)
+            if self.debug_planes:
+                self.add_comment(f"Plane debug - Object type: {plane.objectType}")
+                self.add_comment(f"Plane debug - String representation: {str(plane)}")
+            
+            # Faces and construction planes are both classified by their normal vector
+            object_type = plane.objectType
+            if object_type == _BREP_FACE_TYPE or object_type == _CONSTRUCTION_PLANE_TYPE:
+                is_face = object_type == _BREP_FACE_TYPE
+                surface = plane.geometry
+                if surface.objectType != _PLANE_TYPE:
+                    if self.debug_planes:
+                        if is_face:
+                            self.add_comment(f"Non-planar surface type: {surface.objectType}")
+                        else:
+                            self.add_comment("Construction plane has non-standard geometry")
+                    return "XY"
+                
+                normal = surface.normal
+                plane_name = _plane_name_for_normal(normal)
+                if self.debug_planes:
+                    normal_text = f"({normal.x:.3f}, {normal.y:.3f}, {normal.z:.3f})"
+                    if is_face:
+                        self.add_comment(f"Face normal vector: {normal_text}")
+                        if plane_name:
+                            normal_axis = _PLANE_NORMAL_AXIS[plane_name]
+                            self.add_comment(f"Detected {plane_name} plane (normal points in {normal_axis} direction)")
+                        else:
+                            self.add_comment("Custom plane orientation - defaulting to XY")
+                    else:
+                        self.add_comment(f"Construction plane normal: {normal_text}")
+                        if plane_name:
+                            self.add_comment(f"Construction plane aligned with {plane_name}")
+                        else:
+                            self.add_comment("Custom construction plane orientation - defaulting to XY")
+                return plane_name or "XY"
+            
+            # Fallback: try to parse the string representation for standard planes
+            else:
+                plane_str = str(plane).upper()
+                if self.debug_planes:
+                    self.add_comment(f"Using string parsing fallback for plane: {plane_str}")
+                
+                # Look for origin plane indicators
+                if "XY" in plane_str or "ORIGIN XY" in plane_str:
+                    if self.debug_planes:
+                        self.add_comment("String parsing detected XY plane")
+                    return "XY"
+                elif "XZ" in plane_str or "ORIGIN XZ" in plane_str:
+                    if self.debug_planes:
+                        self.add_comment("String parsing detected XZ plane")
+                    return "XZ"
+                elif "YZ" in plane_str or "ORIGIN YZ" in plane_str:
+                    if self.debug_planes:
+                        self.add_comment("String parsing detected YZ plane")
+                    return "YZ"
+                else:
+                    if self.debug_planes:
+                        self.add_comment("String parsing failed - defaulting to XY")
+                    return "XY"
+                    
+        except Exception as e:
+            if self.debug_planes:
+                self.add_comment(f"Error in plane detection: {str(e)}")
+                self.add_comment("Using XY plane as fallback")
+            return "XY"
+    
+    def convert_point_2d(self, point) -> tuple:
+        """Convert a 2D point to KCL format, accounting for coordinate system differences."""
+        if not self.debug_planes:
+            # Same conversion as convert_internal_to_display_units with the scale looked up once,
+            # reading both coordinates in a single API call
+            xyz = point.asArray()
+            scale = self.unit_scale
+            return (round(xyz[0] * scale, 3), round(xyz[1] * scale, 3) * self._y_sign)
+        
+        self.add_comment(f"Raw point values (cm): x={point.x}, y={point.y}")
+        
+        # Convert from internal centimeters to display units
+        x = self.convert_internal_to_display_units(point.x)
+        y = self.convert_internal_to_display_units(point.y)
+        
+        # Handle coordinate system differences between Fusion 360 and KCL
+        if self.current_sketch_plane == "XZ":
+            # For XZ plane, flip the Y coordinate to match KCL coordinate system
+            original_y = y
+            y = -y
+            # Only log the first coordinate flip to avoid spam
+            if self.debug_planes and not self._xz_flip_logged:
+                self.add_comment(f"XZ plane: Flipping Y coordinates (e.g., {original_y} -> {y})")
+                self._xz_flip_logged = True
+        
+        return (x, y)
+    
+    def convert_points_2d(self, points) -> list:
+        """Convert a batch of 2D points to KCL format, looking up the unit scale only once."""
+        if self.debug_planes:
+            # Keep the per-point debug comments
+            return [self.convert_point_2d(point) for point in points]
+        
+        # asArray reads all coordinates in one API call instead of one per x and y property
+        return self.convert_coordinates_2d([point.asArray() for point in points])
+    
+    def convert_coordinates_2d(self, coordinates) -> list:
+        """Convert already read (x, y[, z]) centimeter coordinates like convert_points_2d, without debug comments."""
+        scale = self.unit_scale
+        y_sign = self._y_sign
+        return [(round(xyz[0] * scale, 3), round(xyz[1] * scale, 3) * y_sign) for xyz in coordinates]
+    
+    @property
+    def unit_scale(self) -> float:
+        """The factor converting internal centimeters to display units for the current export."""
+        if self._unit_scale is None:
+            self._unit_scale = self.get_display_unit_scale()
+        return self._unit_scale
+    
+    def get_units_manager(self):
+        """Return the active design's units manager, or None if the active product is not a design."""
+        units_manager = self._units_manager
+        if units_manager is None:
+            design = app.activeProduct
+            if design and design.objectType == _DESIGN_TYPE:
+                units_manager = self._units_manager = design.unitsManager
+        return units_manager
+    
+    def get_display_unit_scale(self) -> float:
+        """Return the factor converting internal centimeters to display units."""
+        try:
+            units_manager = self.get_units_manager()
+            if units_manager is None:
+                return 1.0  # Fallback to cm
+            return units_manager.convert(1.0, 'cm', units_manager.defaultLengthUnits)
+        except:
+            return 1.0  # Fallback to raw value
+    
+    def convert_internal_to_display_units(self, value_cm: float) -> float:
+        """Convert internal centimeter values to display units."""
+        if not self.debug_planes:
+            return round(value_cm * self.unit_scale, 3)
+        
+        # Debug exports convert through the units manager so every conversion is logged
+        try:
+            # Get the active design's units manager
+            units_manager = self.get_units_manager()
+            if units_manager is None:
+                return round(value_cm, 3)  # Fallback to cm
+            
+            # Convert from centimeters to display units
+            length_units = units_manager.defaultLengthUnits
+            display_value = units_manager.convert(value_cm, 'cm', length_units)
+            self.add_comment(f"Converted {value_cm} cm to {display_value} {length_units}")
+            
+            return round(display_value, 3)
+            
+        except Exception as e:
+            if self.debug_planes:
+                self.add_comment(f"Unit conversion failed: {str(e)}, using raw value")
+            return round(value_cm, 3)  # Fallback to raw value
+    
+    def adjust_extrude_distance(self, distance: float, sketch_plane: str) -> float:
+        """Adjust extrude distance for coordinate system differences between Fusion 360 and KCL."""
+        if sketch_plane == "XZ":
+            # For XZ plane, flip the extrude direction to match KCL coordinate system
+            adjusted_distance = -distance
+            if self.debug_planes:
+                self.add_comment(f"XZ plane: Flipped extrude direction from {distance} to {adjusted_distance}")
+            return adjusted_distance
+        else:
+            # For XY and YZ planes, no adjustment needed
+            return distance
+    
+    def track_extrude_bodies(self, extrude_feature: adsk.fusion.ExtrudeFeature, kcl_var_name: str):
+        """Track the bodies created by an extrude feature for use in combine operations."""
+        # Read the flag once; this method checks it at almost every step
+        debug = self.debug_planes
+        try:
+            # Store the mapping from Fusion feature to KCL variable name using entity token
+            feature_token = _entity_token(extrude_feature)
+            self.feature_to_kcl_name[feature_token] = kcl_var_name
+            # Extrude IDs only increase, so appending keeps the names in creation order;
+            # grouped extrudes are tracked one after another under the same name
+            extrude_names = self._extrude_names
+            if not extrude_names or extrude_names[-1] != kcl_var_name:
+                extrude_names.append(kcl_var_name)
+            
+            if debug:
+                self.add_comment(f"Attempting to track bodies for {kcl_var_name}")
+            
+            # Check the extrude operation type; it is only reported in debug comments
+            operation_name = "unknown"
+            if debug:
+                try:
+                    operation_type = extrude_feature.operation
+                    operation_name = _EXTRUDE_OPERATION_NAMES.get(operation_type) or f"Unknown({operation_type})"
+                    self.add_comment(f"Extrude operation type: {operation_name}")
+                except Exception as op_error:
+                    self.add_comment(f"Could not get operation type: {str(op_error)}")
+            
+            # Get all bodies created/modified by this extrude
+            bodies = []
+            
+            # Check if bodies property exists and is accessible
+            bodies_collection = getattr(extrude_feature, 'bodies', None)
+            if bodies_collection is not None:
+                if debug:
+                    self.add_comment(f"Extrude has bodies property")
+                try:
+                    if bodies_collection:
+                        body_count = bodies_collection.count
+                        if debug:
+                            self.add_comment(f"Bodies collection has {body_count} bodies")
+                        
+                        item = bodies_collection.item
+                        for i in range(body_count):
+                            try:
+                                body = item(i)
+                                bodies.append(body)
+                                if debug:
+                                    self.add_comment(f"Successfully accessed body {i}")
+                            except Exception as body_error:
+                                if debug:
+                                    self.add_comment(f"Error accessing body {i}: {str(body_error)}")
+                    else:
+                        if debug:
+                            self.add_comment("Bodies collection is None or empty")
+                except Exception as bodies_error:
+                    if debug:
+                        self.add_comment(f"Error accessing bodies collection: {str(bodies_error)}")
+            else:
+                if debug:
+                    self.add_comment("Extrude does not have bodies property")
+            
+            # Check linked features (for multi-component extrudes)
+            linked_features = getattr(extrude_feature, 'linkedFeatures', None)
+            if linked_features is not None:
+                try:
+                    linked_count = linked_features.count
+                    if linked_count > 0:
+                        if debug:
+                            self.add_comment(f"Found {linked_count} linked features")
+                        
+                        item = linked_features.item
+                        for i in range(linked_count):
+                            linked_bodies = getattr(item(i), 'bodies', None)
+                            if linked_bodies:
+                                linked_item = linked_bodies.item
+                                bodies.extend([linked_item(j) for j in range(linked_bodies.count)])
+                    else:
+                        if debug:
+                            self.add_comment("No linked features found")
+                except Exception as linked_error:
+                    if debug:
+                        self.add_comment(f"Error accessing linked features: {str(linked_error)}")
+            
+            # Map each body to the KCL variable that created it using entity token
+            body_to_feature_map = self.body_to_feature_map
+            for body in bodies:
+                try:
+                    body_token = _entity_token(body)
+                    body_to_feature_map[body_token] = kcl_var_name
+                    if debug:
+                        body_name = getattr(body, 'name', 'Unnamed body')
+                        self.add_comment(f"Body tracking: {body_name} (token: {body_token}) created by {kcl_var_name}")
+                except Exception as mapping_error:
+                    if debug:
+                        self.add_comment(f"Error mapping body: {str(mapping_error)}")
+            
+            # Implement logical body tracking regardless of API access issues
+            if len(bodies) == 0:
+                if debug:
+                    self.add_comment(f"No bodies found via API - implementing logical tracking for {operation_name} operation")
+                
+                # Check component body count to understand the model state
+                try:
+                    component = extrude_feature.parentComponent
+                    component_bodies = getattr(component, 'bRepBodies', None) if component else None
+                    if component_bodies is not None:
+                        body_count = component_bodies.count
+                        if debug:
+                            self.add_comment(f"Component has {body_count} total bodies")
+                        
+                        if body_count == 1:
+                            # There's only one body in the component
+                            single_body = component_bodies.item(0)
+                            single_body_token = _entity_token(single_body)
+                            self.body_to_feature_map[single_body_token] = kcl_var_name
+                            bodies.append(single_body)
+                            if debug:
+                                self.add_comment(f"Logical tracking: {kcl_var_name} associated with single body")
+                            
+                        elif body_count > 1:
+                            if debug:
+                                self.add_comment(f"Multiple bodies detected - this extrude created a new separate body")
+                            # For multiple bodies, we need to find which one was created by this extrude
+                            # Check each body to see if it was created by this extrude feature
+                            found_new_body = False
+                            item = component_bodies.item
+                            for i in range(body_count):
+                                body = item(i)
+                                try:
+                                    if getattr(body, 'createdBy', None) == extrude_feature:
+                                        body_token = _entity_token(body)
+                                        self.body_to_feature_map[body_token] = kcl_var_name
+                                        bodies.append(body)
+                                        found_new_body = True
+                                        if debug:
+                                            self.add_comment(f"Found body created by {kcl_var_name} via createdBy check")
+                                        break
+                                except Exception as created_by_error:
+                                    if debug:
+                                        self.add_comment(f"Error checking createdBy for body {i}: {str(created_by_error)}")
+                            
+                            # If we couldn't find via createdBy, fall back to assuming last body
+                            if not found_new_body:
+                                new_body = component_bodies.item(body_count - 1)
+                                new_body_token = _entity_token(new_body)
+                                self.body_to_feature_map[new_body_token] = kcl_var_name
+                                bodies.append(new_body)
+                                if debug:
+                                    self.add_comment(f"Fallback: assuming last body was created by {kcl_var_name}")
+                        
+                except Exception as comp_error:
+                    if debug:
+                        self.add_comment(f"Error in logical body tracking: {str(comp_error)}")
+            
+            if debug:
+                self.add_comment(f"Successfully tracked {len(bodies)} bodies for {kcl_var_name}")
+                if len(bodies) == 0:
+                    self.add_comment("WARNING: No bodies were tracked for this extrude - this may cause issues with boolean operations")
+                
+        except Exception as e:
+            if debug:
+                self.add_comment(f"Error tracking bodies for {kcl_var_name}: {str(e)}")
+    
+    
+    def find_kcl_name_for_body(self, body) -> str:
+        """Find the KCL variable name for a body by checking its creation feature."""
+        try:
+            # Check if we already have this body mapped using entity token
+            body_token = _entity_token(body)
+            if body_token in self.body_to_feature_map:
+                kcl_name = self.body_to_feature_map[body_token]
+                if self.debug_planes:
+                    self.add_comment(f"Found cached mapping: {body_token} -> {kcl_name}")
+                return kcl_name
+            
+            # Try to find the feature that created this body
+            creating_feature = getattr(body, 'createdBy', None)
+            if creating_feature:
+                creating_feature_token = _entity_token(creating_feature)
+                if self.debug_planes:
+                    self.add_comment(f"Body created by feature: {creating_feature.objectType}")
+                    self.add_comment(f"Feature token: {creating_feature_token}")
+                    
+                if creating_feature_token in self.feature_to_kcl_name:
+                    kcl_name = self.feature_to_kcl_name[creating_feature_token]
+                    # Add this mapping for future use
+                    self.body_to_feature_map[body_token] = kcl_name
+                    if self.debug_planes:
+                        self.add_comment(f"Found KCL name {kcl_name} for body via createdBy feature")
+                    return kcl_name
+                else:
+                    if self.debug_planes:
+                        self.add_comment(f"Creating feature token not found in feature_to_kcl_name mapping")
+                        self.add_comment(f"Available feature tokens: {list(self.feature_to_kcl_name.keys())}")
+            else:
+                if self.debug_planes:
+                    self.add_comment("Body has no createdBy feature")
+            
+            if self.debug_planes:
+                self.add_comment("Could not find KCL name for body")
+            return None
+            
+        except Exception as e:
+            if self.debug_planes:
+                self.add_comment(f"Error finding KCL name for body: {str(e)}")
+            return None
+    
+    def track_combine_result(self, combine_feature: adsk.fusion.CombineFeature, kcl_var_name: str):
+        """Track the result body created by a combine operation."""
+        try:
+            # Store the mapping from combine feature to KCL variable name using entity token
+            combine_token = _entity_token(combine_feature)
+            self.feature_to_kcl_name[combine_token] = kcl_var_name
+            
+            # Try to find the result body (this is tricky as combine operations modify existing bodies)
+            # For now, we'll assume the target body becomes the result
+            target_body = getattr(combine_feature, 'targetBody', None)
+            if target_body:
+                target_body_token = _entity_token(target_body)
+                # Update the mapping - the target body now represents the result of the combine
+                self.body_to_feature_map[target_body_token] = kcl_var_name
+                if self.debug_planes:
+                    self.add_comment(f"Updated body mapping: target body (token: {target_body_token}) now maps to {kcl_var_name}")
+            
+        except Exception as e:
+            if self.debug_planes:
+                self.add_comment(f"Error tracking combine result: {str(e)}")
+    
+    
+    def get_safe_name(self, name: str) -> str:
+        """Convert a name to a safe KCL variable name in lowerCamelCase."""
+        try:
+            return self._safe_name_cache[name]
+        except KeyError:
+            safe_name = self._safe_name_cache[name] = self.make_safe_name(name)
+            return safe_name
+    
+    def make_safe_name(self, name: str) -> str:
+        """Build the lowerCamelCase KCL variable name for get_safe_name."""
+        if name.isascii() and name.isalnum():
+            # Plain ASCII letters and digits form a single word, so skip the regex
+            words = [name]
+        else:
+            # Remove special characters and split on spaces/underscores
+            words = _NAME_WORD_PATTERN.findall(name)
+        if not words:
+            return "unnamed"
+        
+        # Convert to lowerCamelCase
+        safe_name = words[0].lower()
+        for word in words[1:]:
+            safe_name += word.capitalize()
+        
+        # Ensure it starts with a letter
+        if safe_name and safe_name[0].isdigit():
+            safe_name = f"sketch{safe_name.capitalize()}"
+        
+        return safe_name or "unnamed"
+    
+    def get_unique_id(self) -> str:
+        """Generate a unique ID for naming KCL entities."""
+        return str(next(self._ids))
+    
+    def sort_curves_by_connectivity(self, all_curves, endpoints=None):
+        """Sort curves by their connectivity to form a continuous profile.
+        
+        If endpoints is a dict, it is filled with the (start, end) centimeter coordinates read
+        for each curve, keyed by id() of the curve object in all_curves.
+        """
+        # Read the flag once; the loops below check it for every curve
+        debug = self.debug_planes
+        if not all_curves:
+            return []
+        
+        if debug:
+            self.add_comment(f"Sorting {len(all_curves)} curves for connectivity")
+        
+        curve_endpoints = {}
+        
+        # First pass: collect all endpoints
+        for i, (curve_type, curve) in enumerate(all_curves):
+            start_point = self.get_curve_start_point(curve_type, curve)
+            end_point = self.get_curve_end_point(curve_type, curve)
+            
+            if start_point and end_point:
+                # Read each endpoint's coordinates once; everything below works on these
+                start_xyz = start_point.asArray()
+                end_xyz = end_point.asArray()
+                curve_endpoints[i] = {
+                    'start': start_point,
+                    'end': end_point,
+                    'start_xy': (start_xyz[0], start_xyz[1]),
+                    'end_xy': (end_xyz[0], end_xyz[1]),
+                    'curve': (curve_type, curve),
+                    'used': False
+                }
+                if endpoints is not None:
+                    endpoints[id(curve)] = (curve_endpoints[i]['start_xy'], curve_endpoints[i]['end_xy'])
+                
+                if debug:
+                    start_converted = self.convert_point_2d(start_point)
+                    end_converted = self.convert_point_2d(end_point)
+                    self.add_comment(f"Curve {i} ({curve_type}): {start_converted} -> {end_converted}")
+        
+        # Find the best starting curve (leftmost, then bottommost point), converting all
+        # start points in one batch
+        if debug:
+            start_points = self.convert_points_2d([curve_info['start'] for curve_info in curve_endpoints.values()])
+        else:
+            start_points = self.convert_coordinates_2d([curve_info['start_xy'] for curve_info in curve_endpoints.values()])
+        best_index = _leftmost_point_index(start_points)
+        
+        if best_index is None:
+            if debug:
+                self.add_comment("No valid starting curve found, using original order")
+            return all_curves
+        
+        best_start_curve_idx = list(curve_endpoints)[best_index]
+        best_start_point = start_points[best_index]
+        if debug:
+            self.add_comment(f"Starting with curve {best_start_curve_idx} at point {best_start_point}")
+        
+        # Index the endpoints by tolerance-sized grid cell, so the next curve in the chain
+        # is found by checking the neighbouring cells instead of scanning every curve
+        endpoint_grid = {}
+        for i, curve_info in curve_endpoints.items():
+            for end_key, cell_key in (('start_xy', 'start_cell'), ('end_xy', 'end_cell')):
+                # Keep each endpoint's cell so tracing doesn't recompute it at every step
+                cell = curve_info[cell_key] = self.endpoint_grid_cell(curve_info[end_key])
+                endpoint_grid.setdefault(cell, []).append((i, end_key))
+        
+        # Trace the profile
+        start_curve_info = curve_endpoints[best_start_curve_idx]
+        current_end_xy = start_curve_info['end_xy']
+        current_end_cell = start_curve_info['end_cell']
+        
+        # Add the starting curve
+        sorted_curves = [start_curve_info['curve']]
+        start_curve_info['used'] = True
+        
+        # Follow the chain
+        while len(sorted_curves) < len(all_curves):
+            # Look for the first unused curve that starts or ends where we ended
+            next_curve = self.find_connected_curve(endpoint_grid, curve_endpoints, current_end_xy,
+                                                   cell=current_end_cell)
+            
+            if next_curve:
+                i, end_key = next_curve
+                curve_info = curve_endpoints[i]
+                sorted_curves.append(curve_info['curve'])
+                curve_info['used'] = True
+                if end_key == 'start_xy':
+                    # This curve starts where the current one ends
+                    current_end_xy = curve_info['end_xy']
+                    current_end_cell = curve_info['end_cell']
+                    if debug:
+                        end_converted = self.convert_point_2d(curve_info['end'])
+                        self.add_comment(f"Connected to curve {i}, now at {end_converted}")
+                else:
+                    # This curve ends where the current one ends, so we need to reverse its
+                    # direction conceptually
+                    current_end_xy = curve_info['start_xy']
+                    current_end_cell = curve_info['start_cell']
+                    if debug:
+                        end_converted = self.convert_point_2d(curve_info['start'])
+                        self.add_comment(f"Connected to curve {i} (reversed), now at {end_converted}")
+            else:
+                if debug:
+                    remaining = len(all_curves) - len(sorted_curves)
+                    self.add_comment(f"Could not find next connected curve, {remaining} curves remaining")
+                # Add any remaining curves
+                for i, curve_info in curve_endpoints.items():
+                    if not curve_info['used']:
+                        sorted_curves.append(curve_info['curve'])
+                        curve_info['used'] = True
+                break
+        
+        if debug:
+            self.add_comment(f"Final curve order: {len(sorted_curves)} curves sorted")
+        
+        return sorted_curves
+    
+    def endpoint_grid_cell(self, xy: tuple, tolerance=1e-6) -> tuple:
+        """Return the grid cell of a point for the endpoint index used by sort_curves_by_connectivity."""
+        return (math.floor(xy[0] / tolerance), math.floor(xy[1] / tolerance))
+    
+    def find_connected_curve(self, endpoint_grid: dict, curve_endpoints: dict, xy: tuple, tolerance=1e-6,
+                             cell=None):
+        """Find the lowest-index unused curve with an endpoint within tolerance of xy.
+        
+        Returns (curve index, 'start_xy' or 'end_xy') for the matching end, preferring the start
+        of a curve over its end, or None if no unused curve connects. cell is xy's grid cell,
+        if the caller already has it.
+        """
+        if not xy:
+            return None
+        x, y = xy
+        cell_x, cell_y = cell or self.endpoint_grid_cell(xy, tolerance)
+        best = None
+        # Points within tolerance are at most one cell away in each direction
+        for neighbour_x in (cell_x - 1, cell_x, cell_x + 1):
+            for neighbour_y in (cell_y - 1, cell_y, cell_y + 1):
+                for i, end_key in endpoint_grid.get((neighbour_x, neighbour_y), ()):
+                    curve_info = curve_endpoints[i]
+                    if curve_info['used']:
+                        continue
+                    point_x, point_y = curve_info[end_key]
+                    if abs(point_x - x) < tolerance and abs(point_y - y) < tolerance:
+                        # The lowest curve index wins, then a curve's start over its end
+                        candidate = (i, end_key != 'start_xy', end_key)
+                        if best is None or candidate < best:
+                            best = candidate
+        return (best[0], best[2]) if best else None
+    
+    def get_curve_start_point(self, curve_type: str, curve):
+        """Get the start point of a curve of the given collect_sketch_curves type."""
+        try:
+            sketch_point = getattr(curve, _CURVE_START_POINT_ATTRIBUTES.get(curve_type, ''), None)
+            if sketch_point is None:
+                return None
+            return sketch_point.geometry
+        except RuntimeError:
+            # The API reports failures on broken entities as RuntimeError, for the sketch
+            # point property as well as its geometry
+            return None
+    
+    def get_curve_end_point(self, curve_type: str, curve):
+        """Get the end point of a curve of the given collect_sketch_curves type."""
+        try:
+            sketch_point = getattr(curve, _CURVE_END_POINT_ATTRIBUTES.get(curve_type, ''), None)
+            if sketch_point is None:
+                return None
+            return sketch_point.geometry
+        except RuntimeError:
+            # The API reports failures on broken entities as RuntimeError, for the sketch
+            # point property as well as its geometry
+            return None
+
+
+# Export methods keyed by Fusion feature class type, used by KCLExporter.export_feature
+_FEATURE_EXPORTERS = {
+    _EXTRUDE_FEATURE_TYPE: KCLExporter.export_extrude,
+    _REVOLVE_FEATURE_TYPE: KCLExporter.export_revolve,
+    _COMBINE_FEATURE_TYPE: KCLExporter.export_combine,
+}
+
+# Methods returning the extrude distance for each supported extent definition type
+_EXTRUDE_EXTENT_DISTANCES = {
+    _DISTANCE_EXTENT_TYPE: KCLExporter.extrude_distance_extent,
+    adsk.fusion.ThroughAllExtentDefinition.classType(): KCLExporter.extrude_through_all_extent,
+    adsk.fusion.ToEntityExtentDefinition.classType(): KCLExporter.extrude_to_entity_extent,
+    adsk.fusion.SymmetricExtentDefinition.classType(): KCLExporter.extrude_symmetric_extent,
+    adsk.fusion.TwoSidesExtentDefinition.classType(): KCLExporter.extrude_two_sides_extent,
+}
+
+
+def run(_context: str):
+    """This function is called by Fusion when the script is run."""
+
+    try:
+        # Get the active design
+        design = app.activeProduct
+        if not design:
+            ui.messageBox('No active design found.')
+            return
+        
+        if design.objectType != _DESIGN_TYPE:
+            ui.messageBox('Active product is not a Fusion 360 design.')
+            return
+        
+        # Create the exporter (set debug_planes=True for detailed plane debugging)
+        exporter = KCLExporter(debug_planes=True)
+        
+        # Get the save location first, so the KCL can be streamed to it as it is generated
+        file_dialog = ui.createFileDialog()
+        file_dialog.isMultiSelectEnabled = False
+        file_dialog.title = "Save KCL File"
+        file_dialog.filter = "KCL files (*.kcl)"
+        file_dialog.filterIndex = 0
+        
+        # Set default filename based on design name
+        design_name = design.parentDocument.name
+        if design_name.endswith('.f3d'):
+            design_name = design_name[:-4]  # Remove .f3d extension
+        
+        file_dialog.initialFilename = f"{design_name}.kcl"
+        
+        dialog_result = file_dialog.showSave()
+        if dialog_result == adsk.core.DialogResults.DialogOK:
+            filename = file_dialog.filename
+            
+            # Export the design to KCL, writing each chunk to the file as it is generated
+            KCLExporter.write_kcl_file(filename, exporter.export_design_iter(design))
+            
+            ui.messageBox(f'Successfully exported to KCL:\n{filename}')
+        else:
+            ui.messageBox('Export cancelled.')
+            
+    except Exception as e:
+        # Write the error message to the TEXT COMMANDS window
+        error_msg = f'Failed to export KCL:\n{traceback.format_exc()}'
+        app.log(error_msg)
+        
+        # Also log some debugging information
+        try:
+            design = app.activeProduct
+            if design:
+                app.log(f'Active design: {design.parentDocument.name}')
+                root_component = design.rootComponent
+                app.log(f'Root component: {root_component.name}')
+                app.log(f'Number of sketches: {root_component.sketches.count}')
+                app.log(f'Number of features: {root_component.features.count}')
+        except:
+            app.log('Could not gather debugging information')
+        
+        ui.messageBox(f'Export failed. Check the Text Commands window for details.\n\nError: {str(e)}')